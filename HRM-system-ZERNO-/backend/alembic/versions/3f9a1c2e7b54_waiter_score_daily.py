@@ -0,0 +1,51 @@
+"""waiter score daily rollup
+
+Revision ID: 3f9a1c2e7b54
+Revises: bccd1e6c7daf
+Create Date: 2026-10-18 10:12:41.530112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2e7b54'
+down_revision: Union[str, None] = 'bccd1e6c7daf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('waiter_score_daily',
+    sa.Column('waiter_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('feedback_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Integer(), nullable=False),
+    sa.Column('score_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ),
+    sa.ForeignKeyConstraint(['waiter_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('waiter_id', 'day', 'category_id', 'tag_id')
+    )
+    
+    # backfill from existing scores, same as app.scripts.backfill_waiter_score_daily
+    op.execute(
+        """
+            INSERT INTO waiter_score_daily
+                (waiter_id, day, category_id, tag_id, feedback_count, score_sum, score_count)
+            SELECT ws.waiter_id, COALESCE(f.created_at::date, CURRENT_DATE), ws.category_id, ws.tag_id,
+                   COUNT(ws.id), SUM(ws.score), COUNT(ws.score)
+            FROM waiter_scores ws
+            JOIN feedbacks f ON f.id = ws.feedback_id
+            GROUP BY ws.waiter_id, COALESCE(f.created_at::date, CURRENT_DATE), ws.category_id, ws.tag_id;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('waiter_score_daily')
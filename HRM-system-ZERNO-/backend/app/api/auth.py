@@ -0,0 +1,22 @@
+from typing import Annotated
+
+from fastapi import Depends
+
+from app.api.routes.authentication import oauth2_scheme
+from app.schema.authentication import TokenClaims
+from app.service.authentication import AuthenticationService
+
+
+async def get_current_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenClaims:
+    claims, _ = await AuthenticationService.authenticate_token(token)
+    return claims
+
+
+async def get_current_admin_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenClaims:
+    claims, _ = await AuthenticationService.authenticate_token(token, admin=True)
+    return claims
+
+
+# claims of a valid token, no database session is opened for them
+CurrentUserClaims = Annotated[TokenClaims, Depends(get_current_claims)]
+CurrentAdminClaims = Annotated[TokenClaims, Depends(get_current_admin_claims)]
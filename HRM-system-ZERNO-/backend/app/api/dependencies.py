@@ -10,6 +10,9 @@ from app.repository.public.registration_request import RegistrationRequestReposi
 from app.repository.public.role import RoleRepositroy
 from app.repository.public.category import CategoryRepository
 from app.repository.public.waiters_score import WaiterScoreRepository
+from app.repository.public.waiter_score_daily import WaiterScoreDailyRepository
+from app.repository.public.telegram_outbox import TelegramOutboxRepository
+from app.repository.public.refresh_token import RefreshTokenRepository
 
 from app.db.db import get_db
 
@@ -22,6 +25,7 @@ from app.service.public.registration_request import RegistrationRequest
 from app.service.public.role import RoleService  
 from app.service.stats import StatsService
 from app.service.public.waiters_score import WaiterScoreService
+from app.service.public.waiter_score_daily import WaiterScoreDailyService
 from app.service.public.category import CategoryService
 from app.service.public.tag import TagService
 from app.service.telegram_bot import TelegramFormatMessageService
@@ -78,6 +82,24 @@ def get_waiter_score_repository(
     return WaiterScoreRepository(conn)
 
 
+def get_waiter_score_daily_repository(
+    conn: AsyncSession
+) -> WaiterScoreDailyRepository:
+    return WaiterScoreDailyRepository(conn)
+
+
+def get_telegram_outbox_repository(
+    conn: AsyncSession
+) -> TelegramOutboxRepository:
+    return TelegramOutboxRepository(conn)
+
+
+def get_refresh_token_repository(
+    conn: AsyncSession
+) -> RefreshTokenRepository:
+    return RefreshTokenRepository(conn)
+
+
 def get_role_repository(
     conn: AsyncSession
 ) -> RoleRepositroy:
@@ -88,10 +110,16 @@ def get_feedback_service(
     session: AsyncSession = Depends(get_db)
 ) -> FeedbackService:
     feedback_repo = get_feedback_repository(session)
+    waiter_score_daily_repo = get_waiter_score_daily_repository(session)
+    user_repo = get_user_repository(session)
+    telegram_outbox_repo = get_telegram_outbox_repository(session)
     
     return FeedbackService(
         session=session,
-        feedback_repo=feedback_repo
+        feedback_repo=feedback_repo,
+        waiter_score_daily_repo=waiter_score_daily_repo,
+        user_repo=user_repo,
+        telegram_outbox_repo=telegram_outbox_repo
     )
 
 
@@ -120,18 +148,12 @@ def get_telegram_bot_service(
     session: AsyncSession = Depends(get_db)
 ) -> TelegramFormatMessageService:
     feedback_repo = get_feedback_repository(session)
-    feedback_type_repo = get_feedback_type_repository(session)
     user_repo = get_user_repository(session)
-    category_repo = get_category_repository(session)
-    tag_repo = get_tag_repository(session)
     
     return TelegramFormatMessageService(
         session=session,
         feedback_repo=feedback_repo,
-        feedback_type_repo=feedback_type_repo,
-        user_repo=user_repo,
-        category_repo=category_repo,
-        tag_repo=tag_repo
+        user_repo=user_repo
     )
 
 def get_tag_service(
@@ -190,6 +212,17 @@ def get_waiter_score_service(
     )
     
     
+def get_waiter_score_daily_service(
+    session: AsyncSession = Depends(get_db)
+) -> WaiterScoreDailyService:
+    waiter_score_daily_repo = get_waiter_score_daily_repository(session)
+    
+    return WaiterScoreDailyService(
+        session=session,
+        waiter_score_daily_repo=waiter_score_daily_repo
+    )
+    
+    
 def get_authentication_service(
     session: AsyncSession = Depends(get_db)
 ) -> AuthenticationService:
@@ -199,7 +232,8 @@ def get_authentication_service(
     return AuthenticationService(
         session=session,
         user_service=user_service,
-        role_service=role_service
+        role_service=role_service,
+        refresh_token_repo=get_refresh_token_repository(session)
     )
     
 
@@ -207,13 +241,17 @@ def get_stats_service(
     session: AsyncSession = Depends(get_db)
 ) -> StatsService:
     waiter_score_service = get_waiter_score_service(session)
+    waiter_score_daily_service = get_waiter_score_daily_service(session)
     category_service = get_category_service(session)
     tag_service = get_tag_service(session)
+    feedback_service = get_feedback_service(session)
     
     return StatsService(
         session=session,
         waiter_score_service=waiter_score_service,
+        waiter_score_daily_service=waiter_score_daily_service,
         category_service=category_service,
-        tag_service=tag_service
+        tag_service=tag_service,
+        feedback_service=feedback_service
     )
     
\ No newline at end of file
@@ -0,0 +1,63 @@
+import time
+
+from starlette.routing import Match
+
+from app.service.utils.metrics import Counter, Gauge, Histogram
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "Finished HTTP requests",
+    labelnames=("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    labelnames=("method", "route")
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    labelnames=("method", "route")
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, in flight and finished requests per route.
+    Requests are labelled with the route template, e.g. /stats/get_stats/{waiter_id}, to keep the series bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = self._route(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = http_requests_in_progress.labels(method=method, route=route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            http_request_duration_seconds.labels(method=method, route=route).observe(time.perf_counter() - start)
+            http_requests_total.labels(method=method, route=route, status=status).inc()
+
+    @staticmethod
+    def _route(scope) -> str:
+        # included routers are flattened into the app's routes, a partial match is a wrong method on a known path
+        for route in scope["app"].router.routes:
+            path = getattr(route, "path", None)
+            if path is not None and route.matches(scope)[0] != Match.NONE:
+                return path
+        return "unmatched"
@@ -0,0 +1,101 @@
+import ipaddress
+import json
+import math
+
+from app.service.utils.rate_limit import RateLimiter
+
+
+def normalize_path(path: str) -> str:
+    # /feedbacks/create/ reaches the same route as /feedbacks/create
+    return path.rstrip("/") or "/"
+
+
+def parse_rate_limits(spec: str) -> dict[str, tuple[float, float]]:
+    """
+    "/auth/login=10/60:5,..." -> {"/auth/login": (rate per second, burst capacity)}
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            path, limit = item.split("=")
+            limit, _, burst = limit.partition(":")
+            requests, seconds = limit.split("/")
+            limits[normalize_path(path.strip())] = (float(requests) / float(seconds), float(burst or requests))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}, expected path=requests/seconds[:burst]")
+    return limits
+
+
+def parse_trusted_proxies(spec: str) -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
+    """
+    "127.0.0.1,172.16.0.0/12" -> networks whose X-Real-IP and X-Forwarded-For headers are believed
+    """
+    try:
+        return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+    except ValueError as e:
+        raise ValueError(f"Invalid trusted proxies {spec!r}: {e}")
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that answers 429 once a client runs out of tokens for a limited path.
+    It runs before routing, so rejected requests never open a database session.
+    """
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter,
+        limits: dict[str, tuple[float, float]],
+        trust_forwarded: bool = False,
+        trusted_proxies: list[ipaddress.IPv4Network | ipaddress.IPv6Network] = ()
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.limits = limits
+        self.trust_forwarded = trust_forwarded
+        self.trusted_proxies = list(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        path = normalize_path(scope["path"])
+        if path not in self.limits:
+            await self.app(scope, receive, send)
+            return
+        rate, capacity = self.limits[path]
+        wait = await self.limiter.hit(f"{path}:{self._client(scope)}", rate, capacity)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _client(self, scope) -> str:
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if self.trust_forwarded and self._is_trusted(peer):
+            headers = dict(scope["headers"])
+            # nginx sets X-Real-IP to the address it accepted the connection from
+            if b"x-real-ip" in headers:
+                return headers[b"x-real-ip"].decode("latin-1").strip()
+            if b"x-forwarded-for" in headers:
+                # the proxy appends the address it saw, anything before it is client supplied
+                return headers[b"x-forwarded-for"].decode("latin-1").rsplit(",", 1)[-1].strip()
+        return peer
+
+    def _is_trusted(self, peer: str) -> bool:
+        try:
+            address = ipaddress.ip_address(peer)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
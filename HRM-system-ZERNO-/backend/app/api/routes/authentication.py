@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
 from app.schema.users.user import UserResponse
-from app.schema.authentication import TokenResponse, TokenCreate
+from app.schema.authentication import TokenResponse, TokenCreate, RefreshTokenRequest
 from app.service.authentication import AuthenticationService
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -37,6 +37,34 @@ async def login(
     return token
 
 
+@router.post(
+    "/refresh",
+    response_model=TokenResponse,
+    summary="Refresh tokens",
+    description="Exchange a refresh token for a new access token and refresh token, the used one becomes invalid. "
+                "Presenting a refresh token twice revokes the whole login session",
+)
+async def refresh(
+    request: RefreshTokenRequest,
+    session: AsyncSession = Depends(get_db)
+) -> dict:
+    auth_service = get_authentication_service(session)
+    return await auth_service.refresh_token(request.refresh_token)
+
+
+@router.post(
+    "/logout",
+    summary="Logout",
+    description="Revoke the refresh token and every token rotated from the same login",
+)
+async def logout(
+    request: RefreshTokenRequest,
+    session: AsyncSession = Depends(get_db)
+) -> dict:
+    auth_service = get_authentication_service(session)
+    return await auth_service.logout(request.refresh_token)
+
+
 @router.post(
     "/get_current_admin",
     response_model=UserResponse,
@@ -17,15 +17,17 @@ CommonFeedbackService = Annotated[
     "/get-customer-waiter-feedbacks-paginated",
     response_model=dict,
     summary="Get customer feedbacks of a waiter(s)",
-    description="Get customer feedbacks of a waiter(s) with comments, contacts, and ratings",
+    description="Get customer feedbacks of a waiter(s) with comments, contacts, and ratings. "
+                "Pass the returned cursor to get the next page, with_comment skips feedbacks without a comment",
 )
 async def get_customer_feedbacks(
-    cursor: int = 0,
+    cursor: str = None,
     limit: int = 5,
     waiter_id: int = None,
     start_date: datetime.datetime = None,
     end_date: datetime.datetime = None,
     ascending: bool = False,
+    with_comment: bool = False,
     feedback_service: CommonFeedbackService = CommonFeedbackService
 ) -> dict:
     feedbacks = await feedback_service.get_waiter_feedback_comments_by_date(
@@ -34,7 +36,8 @@ async def get_customer_feedbacks(
         waiter_id=waiter_id,
         start_date=start_date,
         end_date=end_date,
-        ascending=ascending
+        ascending=ascending,
+        with_comment=with_comment
     )
     return feedbacks
     
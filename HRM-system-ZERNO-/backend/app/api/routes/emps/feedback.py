@@ -1,26 +1,31 @@
-import asyncio
-from fastapi import APIRouter, Depends, BackgroundTasks
-from typing import Annotated
+import datetime
+import logging
+import uuid
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Annotated, Literal
 
-import httpx
 from app.api.dependencies import get_feedback_service, get_telegram_bot_service
 
-from app.model import Feedback
-from app.service.public.feedback import FeedbackService
+from app.service.public.feedback import FeedbackService, FEEDBACKS_PAGE_MAX
 from app.service.telegram_bot import TelegramFormatMessageService
-from app.schema.emps.feedbacks import CompleteFeedbackCreate, FeedbackResponse
+from app.schema.emps.feedbacks import CompleteFeedbackCreate, BulkFeedbackCreate, FeedbackResponse
+from app.service.ingest import IngestQueue, IngestQueueFull
+from app.service.idempotency import run_idempotent, request_fingerprint
+from app.service.utils.metrics import Gauge
+from app.config import (
+    feedback_ingest_async,
+    feedback_ingest_queue_size,
+    feedback_ingest_batch_size,
+    feedback_ingest_max_delay
+)
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.db import get_db, get_pool_stats
-from ..config_json import read_config
-
-from dotenv import load_dotenv
-import os 
-load_dotenv()
+from app.db.db import get_db, async_session
+from app.service.config_store import config_store
 
-telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-# временное решени
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -34,81 +39,192 @@ CommonTelegramFormatMessageService = Annotated[
     Depends(get_telegram_bot_service)
 ]
 
-async def send_feedback_messages(
-    telegram_token: str,
-    text: str,
-    chat_ids: list[str],
-):
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-        task = []
-        async def send_message(chat_id: str): 
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "chat_id": chat_id,
-                    "text": text
-                }
-                try:
-                    response = await client.post(url, json=payload)
-                    response.raise_for_status()  # Raise an error for bad responses
-                except httpx.HTTPStatusError as e:
-                    print(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
-                except Exception as e:
-                    print(f"An error occurred: {str(e)}")
-                else:
-                    if response.status_code == 200:
-                        print("Message sent successfully.")
-                    else:
-                        print(f"Failed to send message. Status code: {response.status_code}")
-                        
-        for chat_id in chat_ids:
-            task.append(send_message(chat_id))
-        await asyncio.gather(*task)
+def get_telegram_chat_ids() -> list[str]:
+    # served from memory, the store picks up edits made by other workers in the background
+    return config_store.telegram_chat_ids()
+
+
+async def ingest_feedbacks(batch: list[tuple[str, BulkFeedbackCreate]]):
+    """
+    Write a batch of queued feedbacks, their notifications go through the Telegram outbox.
+    Raising makes the queue retry the batch, it only happens when nothing was committed.
+    """
+    async with async_session() as session:
+        feedback_service: FeedbackService = get_feedback_service(session)
+        
+        results, feedbacks = await feedback_service.bulk_create_feedbacks(
+            [feedback_create.model_dump() for _, feedback_create in batch],
+            notify_chat_ids=get_telegram_chat_ids()
+        )
+        for (ingest_id, _), result in zip(batch, results):
+            if "error" in result:
+                logger.error("Queued feedback %s rejected: %s", ingest_id, result["error"])
+
+
+feedback_ingest_queue = IngestQueue(
+    ingest_feedbacks,
+    maxsize=feedback_ingest_queue_size,
+    batch_size=feedback_ingest_batch_size,
+    max_delay=feedback_ingest_max_delay
+)
+
+Gauge(
+    "feedback_ingest_queue_depth",
+    "Feedbacks accepted with 202 and not yet written",
+    function=feedback_ingest_queue.qsize
+)
+
                     
 @router.post(
     "/create",
     response_model=dict,
     summary="Create new customer feedback",
-    description="Create new customer feedback with comments, contacts, and ratings",
+    description="Create new customer feedback with comments, contacts, and ratings. "
+                "With FEEDBACK_INGEST_ASYNC enabled the feedback is queued and 202 is returned with its ingest id, "
+                "503 means the queue is full and the request should be retried. "
+                "A retry sent with the same Idempotency-Key header gets the first response back "
+                "with Idempotent-Replayed: true instead of creating the feedback again",
 )
 async def create_feedback(
-    background_tasks: BackgroundTasks,
     feedback_create: CompleteFeedbackCreate,
+    idempotency_key: str = Header(None, alias="Idempotency-Key", max_length=255),
     session: AsyncSession = Depends(get_db),
-) -> FeedbackResponse:
-    
-    feedback_service: FeedbackService = get_feedback_service(session)
-    telegram_format_message_service: TelegramFormatMessageService = get_telegram_bot_service(session)
-    
-    feedback: Feedback = await feedback_service.create_feedback(feedback_create)
+) -> dict | JSONResponse:
     
-    print("POOL STATS\n")
-    (await get_pool_stats())
+    async def create() -> tuple[int, dict]:
+        if feedback_ingest_async:
+            ingest_id = str(uuid.uuid4())
+            try:
+                feedback_ingest_queue.submit((
+                    ingest_id,
+                    BulkFeedbackCreate(**feedback_create.model_dump(), created_at=datetime.datetime.now())
+                ))
+            except IngestQueueFull as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+            return 202, {"status": "Feedback accepted", "id": ingest_id}
+        
+        feedback_service: FeedbackService = get_feedback_service(session)
+        
+        await feedback_service.create_feedback(
+            feedback_create,
+            notify_chat_ids=get_telegram_chat_ids()
+        )
+        
+        return 200, {"status": "Feedback created successfully"}
     
-    text = await telegram_format_message_service.format_feedback(feedback)
-    config_data = read_config()
-    telegram_chat_ids = [data["chat_id"] for data in config_data.get("telegram_chat_ids", [])]
-    print("SENDING FROM BOT:" + str(telegram_bot_token))
-    background_tasks.add_task(
-        send_feedback_messages,
-        telegram_token=telegram_bot_token,
-        text=text,
-        chat_ids=telegram_chat_ids,
+    status_code, content, replayed = await run_idempotent(
+        idempotency_key,
+        request_fingerprint(feedback_create.model_dump_json()),
+        create
+    )
+    if replayed:
+        return JSONResponse(status_code=status_code, content=content, headers={"Idempotent-Replayed": "true"})
+    if status_code != 200:
+        return JSONResponse(status_code=status_code, content=content)
+    return content
+
+
+@router.post(
+    "/bulk_create",
+    response_model=dict,
+    summary="Create many customer feedbacks",
+    description="Create up to 1000 customer feedbacks in one transaction, e.g. replayed by an offline kiosk. "
+                "Every item is validated on its own, the response has the id or the error of each item in request order",
+)
+async def bulk_create_feedbacks(
+    items: list[dict] = Body(...),
+    feedback_service: CommonFeedbackService = CommonFeedbackService
+) -> dict:
+    results, feedbacks = await feedback_service.bulk_create_feedbacks(
+        items,
+        notify_chat_ids=get_telegram_chat_ids()
     )
-    return {"status": "Feedback created successfully"}
+    return {
+        "created": len(feedbacks),
+        "failed": len(results) - len(feedbacks),
+        "results": results
+    }
 
 
-# make pagination!
 @router.get(
     "/get_all_feedbacks",
     response_model=list[FeedbackResponse],
     summary="Get all customer feedbacks",
-    description="Get all customer feedbacks with comments, contacts, and ratings",
+    description="Get customer feedbacks with comments, contacts, and ratings, newest first. "
+                "Without cursor and limit every matching feedback is returned. "
+                "With either of them one page is returned (50 by default), "
+                "the cursor of the next page is in the X-Next-Cursor header, it is absent on the last page",
 )
 async def get_all_feedbacks(
+    response: Response,
+    cursor: str = None,
+    limit: int = Query(None, ge=1, le=FEEDBACKS_PAGE_MAX),
+    waiter_id: int = None,
+    start_date: datetime.datetime = None,
+    end_date: datetime.datetime = None,
+    has_contact: bool = None,
+    has_comment: bool = None,
     feedback_service: CommonFeedbackService = CommonFeedbackService
 ) -> list[FeedbackResponse]:
-    feedbacks: list[Feedback] = await feedback_service.get_all_feedbacks()
-    return [FeedbackResponse.from_orm(feedback.__dict__) for feedback in feedbacks]
+    page = await feedback_service.get_all_feedbacks(
+        cursor=cursor,
+        limit=limit,
+        waiter_id=waiter_id,
+        start_date=start_date,
+        end_date=end_date,
+        has_contact=has_contact,
+        has_comment=has_comment
+    )
+    if page["cursor"]:
+        response.headers["X-Next-Cursor"] = page["cursor"]
+    return [FeedbackResponse.from_orm(feedback.__dict__) for feedback in page["feedbacks"]]
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export customer feedbacks",
+    description="Stream all customer feedbacks in the period, oldest first, as NDJSON or CSV",
+)
+async def export_feedbacks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start_date: datetime.datetime = None,
+    end_date: datetime.datetime = None
+) -> StreamingResponse:
+    # the request scoped session is closed before the body is streamed, so the export opens its own
+    async def content():
+        async with async_session() as session:
+            feedback_service: FeedbackService = get_feedback_service(session)
+            async for chunk in feedback_service.export_feedbacks(
+                format=format,
+                start_date=start_date,
+                end_date=end_date
+            ):
+                yield chunk
+    
+    return StreamingResponse(
+        content(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="feedbacks.{format}"'}
+    )
+
+
+@router.get(
+    "/notifications/stats",
+    response_model=dict,
+    summary="Telegram notification stats",
+    description="Outbox rows by status and the delivery counters of this worker since it started",
+)
+async def get_notification_stats(
+    feedback_service: CommonFeedbackService = CommonFeedbackService
+) -> dict:
+    return await feedback_service.get_notification_stats()
 
 
 @router.delete(
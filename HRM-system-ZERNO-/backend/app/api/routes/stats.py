@@ -1,7 +1,10 @@
+import datetime
+from typing import Literal
+
 from ..dependencies import get_stats_service
 from app.service.stats import StatsService
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 
 router = APIRouter()
@@ -31,3 +34,68 @@ async def get_tags_stats(
 ) -> dict:
     tags_stats = await stats_service.get_tags_stats(waiter_id=waiter_id)
     return tags_stats
+
+
+@router.get(
+    "/series",
+    summary="Get feedback time series",
+    description="Get feedback counts, average waiter score and average rating per hour/day/week/month bucket, empty buckets included",
+)
+async def get_series(
+    granularity: Literal["hour", "day", "week", "month"] = "day",
+    start_date: datetime.datetime = None,
+    end_date: datetime.datetime = None,
+    waiter_id: int = None,
+    feedback_type_id: int = None,
+    stats_service: StatsService = Depends(get_stats_service),
+) -> dict:
+    series = await stats_service.get_feedback_series(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        waiter_id=waiter_id,
+        feedback_type_id=feedback_type_id
+    )
+    return series
+
+
+@router.get(
+    "/ratings_heatmap",
+    summary="Get ratings heatmap",
+    description="Get average rating and rating count by weekday (Monday is 0) and hour as 7x24 arrays",
+)
+async def get_ratings_heatmap(
+    start_date: datetime.datetime = None,
+    end_date: datetime.datetime = None,
+    feedback_type_id: int = None,
+    stats_service: StatsService = Depends(get_stats_service),
+) -> dict:
+    heatmap = await stats_service.get_ratings_heatmap(
+        start_date=start_date,
+        end_date=end_date,
+        feedback_type_id=feedback_type_id
+    )
+    return heatmap
+
+
+@router.get(
+    "/leaderboard",
+    summary="Get waiters leaderboard",
+    description="Rank waiters by CSAT, average waiter score or feedback volume over a period",
+)
+async def get_leaderboard(
+    start_date: datetime.date = None,
+    end_date: datetime.date = None,
+    metric: Literal["csat", "avg_score", "feedbacks"] = "csat",
+    top_k: int = Query(10, ge=1, le=100),
+    min_feedbacks: int = Query(1, ge=0),
+    stats_service: StatsService = Depends(get_stats_service),
+) -> dict:
+    leaderboard = await stats_service.get_leaderboard(
+        start_date=start_date,
+        end_date=end_date,
+        metric=metric,
+        top_k=top_k,
+        min_feedbacks=min_feedbacks
+    )
+    return leaderboard
@@ -8,6 +8,71 @@ chat_id = os.getenv("CHAT_ID")
 secret_key = os.getenv("SECRET_KEY")
 algorithm = os.getenv("ALGORITHM")
 access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+# refresh tokens rotate on every use, expired ones are deleted every REFRESH_TOKEN_SWEEP_INTERVAL seconds
+refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+refresh_token_sweep_interval = int(os.getenv("REFRESH_TOKEN_SWEEP_INTERVAL", 3600))
+# user records behind access tokens, memory:// per worker, redis:// to share them and their invalidation
+auth_user_cache_url = os.getenv("AUTH_USER_CACHE_URL", "memory://")
+auth_user_cache_ttl = int(os.getenv("AUTH_USER_CACHE_TTL", 60))
+# bcrypt cost, stored hashes with another cost are replaced on the next successful login
+password_hash_rounds = int(os.getenv("PASSWORD_HASH_ROUNDS", 12))
+# threads hashing in parallel, each one keeps a core busy for the duration of a hash
+password_hash_workers = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+# admin editable settings such as the Telegram chat ids, relative to the working directory
+app_config_file = os.getenv("APP_CONFIG_FILE", "backend/app/config/app_config.json")
+
+# memory:// for a single worker, redis://[:password@]host[:port][/db] to share between workers
+stats_cache_url = os.getenv("STATS_CACHE_URL", "memory://")
+stats_cache_ttl = int(os.getenv("STATS_CACHE_TTL", 300))
+
+# results of /feedbacks/create requests sent with an Idempotency-Key, redis:// deduplicates across workers
+idempotency_cache_url = os.getenv("IDEMPOTENCY_CACHE_URL", "memory://")
+idempotency_ttl = int(os.getenv("IDEMPOTENCY_TTL", 86400))
+idempotency_max_keys = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000))
+
+# per client token buckets for the public endpoints, memory:// counts per worker, redis:// across workers
+rate_limit_enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+rate_limit_url = os.getenv("RATE_LIMIT_URL", "memory://")
+# comma separated path=requests/seconds[:burst], burst defaults to requests
+rate_limits = os.getenv(
+    "RATE_LIMITS",
+    "/feedbacks/create=30/60:10,"
+    "/feedbacks/bulk_create=6/60:3,"
+    "/registration_requests/register=5/3600:3,"
+    "/auth/login=10/60:5,"
+    "/auth/forgot-password=3/3600:3,"
+    "/auth/reset-password=10/3600:5"
+)
+# behind the nginx proxy the client comes from X-Real-IP (or the last X-Forwarded-For address),
+# only enable it when the backend is reachable through the proxy alone; the headers are only read
+# from peers in RATE_LIMIT_TRUSTED_PROXIES (addresses or networks), anyone else could send them
+rate_limit_trust_forwarded = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+rate_limit_trusted_proxies = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1,::1")
+
+# true: /feedbacks/create answers 202 and feedbacks are written in batches by a background worker
+feedback_ingest_async = os.getenv("FEEDBACK_INGEST_ASYNC", "false").lower() == "true"
+feedback_ingest_queue_size = int(os.getenv("FEEDBACK_INGEST_QUEUE_SIZE", 10000))
+feedback_ingest_batch_size = int(os.getenv("FEEDBACK_INGEST_BATCH_SIZE", 100))
+feedback_ingest_max_delay = float(os.getenv("FEEDBACK_INGEST_MAX_DELAY", 0.2))
+
+# Telegram notifications are delivered from the telegram_outbox table by a background dispatcher
+telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+telegram_api_url = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+telegram_concurrency = int(os.getenv("TELEGRAM_CONCURRENCY", 4))
+# Telegram allows about 30 messages per second per bot and 20 per minute per group chat
+telegram_rate_per_second = float(os.getenv("TELEGRAM_RATE_PER_SECOND", 25))
+telegram_chat_rate_per_minute = float(os.getenv("TELEGRAM_CHAT_RATE_PER_MINUTE", 20))
+# every worker runs a dispatcher: with redis:// they share the bot and chat buckets,
+# with memory:// each one gets 1/TELEGRAM_WORKERS of the rates
+telegram_rate_limit_url = os.getenv("TELEGRAM_RATE_LIMIT_URL", "memory://")
+telegram_workers = int(os.getenv("TELEGRAM_WORKERS", os.getenv("WEB_CONCURRENCY", 1)))
+telegram_max_attempts = int(os.getenv("TELEGRAM_MAX_ATTEMPTS", 8))
+# digest mode: hold notifications up to this many seconds (0 = off) or items per chat and send one summary,
+# negative feedback and scores or ratings up to TELEGRAM_URGENT_MAX_SCORE still go out immediately
+telegram_digest_seconds = int(os.getenv("TELEGRAM_DIGEST_SECONDS", 0))
+telegram_digest_max_items = int(os.getenv("TELEGRAM_DIGEST_MAX_ITEMS", 20))
+telegram_urgent_max_score = int(os.getenv("TELEGRAM_URGENT_MAX_SCORE", 2))
 
 
 # Email configuration
@@ -15,4 +80,7 @@ email_host = os.environ.get("EMAIL_HOST", "smtp.gmail.com")
 email_port = int(os.environ.get("EMAIL_PORT", 587))
 email_user = os.environ.get("EMAIL_USER", "han_ai@auca.kg")
 email_password = os.environ.get("EMAIL_PASSWORD", "oalo cxay tmku mybx")
+# STARTTLS on ports other than 465 (which is TLS from the start), disable for a local test server
+email_use_tls = os.environ.get("EMAIL_USE_TLS", "true").lower() == "true"
+email_queue_size = int(os.environ.get("EMAIL_QUEUE_SIZE", 1000))
 app_url = os.environ.get("APP_URL", "http://localhost:5173")
\ No newline at end of file
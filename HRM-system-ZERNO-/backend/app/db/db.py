@@ -1,10 +1,32 @@
+import time
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import connection_string
+from app.service.utils.metrics import Gauge, Histogram
+
+pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the pool, including opening a new one"
+)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default pool of the async engine, timing every checkout
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start)
+
 
 async_engine = create_async_engine(
     connection_string, 
     echo=False,
+    poolclass=TimedAsyncAdaptedQueuePool,
     pool_size=20,          # Increased pool size
     max_overflow=20,       # Increased overflow
     pool_timeout=60,       # Increased timeout
@@ -18,18 +40,20 @@ async_session = sessionmaker(
     class_=AsyncSession
 )
 
-async def get_pool_stats():
-    pool = async_engine.pool
-    print(f"Открытых соединений: {pool.size()}")
-    print(f"Ожидающих соединений: {pool.checkedin()}")
-    return 
-    
+Gauge("db_pool_size", "Connections the pool keeps open", function=lambda: async_engine.pool.size())
+Gauge("db_pool_checked_out", "Connections in use", function=lambda: async_engine.pool.checkedout())
+Gauge("db_pool_checked_in", "Idle connections in the pool", function=lambda: async_engine.pool.checkedin())
+Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size, negative while the pool is not yet filled",
+    function=lambda: async_engine.pool.overflow()
+)
+
 async def get_db():
     async with async_session() as session:
         try:
             yield session
         finally:
-            print("CLOSING SESSION\n\n")
             await session.close()
 
 
@@ -5,19 +5,63 @@ from app.db.db import create_all, async_engine
 from contextlib import asynccontextmanager
 
 from app.api.routes.main import router as api_router 
+from app.service.reference_data import reference_data
+from app.api.routes.emps.feedback import feedback_ingest_queue
+from app.service.telegram_dispatcher import telegram_dispatcher
+from app.service.config_store import config_store
+from app.service.utils.password import password_hasher
+from app.service.authentication import refresh_token_sweeper
+from app.service.mailer import mailer
+from app.api.rate_limit import RateLimitMiddleware, parse_rate_limits, parse_trusted_proxies
+from app.api.metrics import MetricsMiddleware
+from app.service.utils.rate_limit import create_rate_limiter
+from app.config import (
+    feedback_ingest_async,
+    rate_limit_enabled,
+    rate_limit_url,
+    rate_limits,
+    rate_limit_trust_forwarded,
+    rate_limit_trusted_proxies
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # on startup
     # await create_all()
+    await reference_data.load()
+    config_store.start()
+    if feedback_ingest_async:
+        feedback_ingest_queue.start()
+    telegram_dispatcher.start()
+    refresh_token_sweeper.start()
+    mailer.start()
     try:
         yield
     finally:
         #on shutdown
+        # write what is still queued before the engine goes away
+        await feedback_ingest_queue.stop()
+        # undelivered notifications stay in the outbox for the next start
+        await telegram_dispatcher.stop()
+        await config_store.stop()
+        await refresh_token_sweeper.stop()
+        # queued emails are in memory only, give them a chance to go out
+        await mailer.stop()
+        password_hasher.shutdown()
         await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
+if rate_limit_enabled:
+    # added before CORS so that 429 responses still carry the CORS headers
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=create_rate_limiter(rate_limit_url, namespace="ratelimit"),
+        limits=parse_rate_limits(rate_limits),
+        trust_forwarded=rate_limit_trust_forwarded,
+        trusted_proxies=parse_trusted_proxies(rate_limit_trusted_proxies),
+    )
+
 origins = [
     "*",
 ]
@@ -28,6 +72,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# outermost, so that rejected and failed requests are measured too
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router)
\ No newline at end of file
@@ -8,4 +8,7 @@ from .public.rating import Rating
 from .public.role import Role
 from .public .user import User
 from .public.registration_request import RegistrationRequest
-from .public.password_reset import PasswordReset
\ No newline at end of file
+from .public.password_reset import PasswordReset
+from .public.waiter_score_daily import WaiterScoreDaily
+from .public.telegram_outbox import TelegramOutbox
+from .public.refresh_token import RefreshToken
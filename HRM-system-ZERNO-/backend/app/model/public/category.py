@@ -2,6 +2,10 @@ from app.db.db import Base
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
+POSITIVE_CATEGORY = "положительный"
+NEUTRAL_CATEGORY = "нейтральный"
+NEGATIVE_CATEGORY = "негативный"
+
 
 class Category(Base):
     __tablename__ = 'categories'
@@ -1,5 +1,5 @@
 from app.db.db import Base
-from sqlalchemy import Column, Integer, DateTime, Boolean
+from sqlalchemy import Column, Integer, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from datetime import datetime
@@ -7,12 +7,16 @@ from datetime import datetime
 
 class Feedback(Base):
     __tablename__ = 'feedbacks'
+    __table_args__ = (
+        # keyset pagination order, also serves every created_at range filter
+        Index('ix_feedbacks_created_at_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     created_at = Column(DateTime, default=datetime.now())
     is_notified = Column(Boolean, default=False)
     
-    waiter_score = relationship('WaiterScore', back_populates='feedback', uselist=False, cascade='all, delete-orphan', lazy="subquery")    
-    contact = relationship('Contact', back_populates='feedback', uselist=False, cascade='all, delete-orphan', lazy="subquery") # for deleting purpose
-    ratings = relationship('Rating', back_populates='feedback', cascade='all, delete-orphan', lazy="subquery")
+    waiter_score = relationship('WaiterScore', back_populates='feedback', uselist=False, cascade='all, delete-orphan')    
+    contact = relationship('Contact', back_populates='feedback', uselist=False, cascade='all, delete-orphan') # for deleting purpose
+    ratings = relationship('Rating', back_populates='feedback', cascade='all, delete-orphan')
     
\ No newline at end of file
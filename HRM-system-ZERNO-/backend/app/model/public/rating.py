@@ -8,7 +8,7 @@ class Rating(Base):
     
     id = Column(Integer, primary_key=True)
     rating = Column(Integer, nullable=False)
-    feedback_id = Column(Integer, ForeignKey('feedbacks.id'), nullable=False)
+    feedback_id = Column(Integer, ForeignKey('feedbacks.id'), nullable=False, index=True)
     feedback_type_id = Column(Integer, ForeignKey('feedback_types.id'), nullable=False)
     
     feedback = relationship('Feedback', back_populates='ratings')
@@ -0,0 +1,22 @@
+from app.db.db import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from datetime import datetime
+
+
+class RefreshToken(Base):
+    """
+    A refresh token is stored as the sha256 of its value and can be used once: using it rotates it into a new row
+    of the same family. A used token presented again means it leaked, and the whole family is revoked.
+    """
+    __tablename__ = 'refresh_tokens'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    family_id = Column(String(36), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    # users.token_version when issued, a newer version revokes the token
+    token_version = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
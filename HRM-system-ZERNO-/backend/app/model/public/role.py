@@ -2,6 +2,9 @@ from app.db.db import Base
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
+WAITER_ROLE = "официант"
+ADMIN_ROLE = "админ"
+
 
 class Role(Base):
     __tablename__ = "roles"
@@ -0,0 +1,30 @@
+from app.db.db import Base
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+
+from datetime import datetime
+
+OUTBOX_PENDING = "pending"
+OUTBOX_FAILED = "failed"
+
+
+class TelegramOutbox(Base):
+    """
+    One pending Telegram notification per feedback and chat, written in the same transaction as the feedback.
+    Rows are deleted once delivered, the ones that can never be delivered are kept as failed.
+    digest rows are held until next_attempt_at and then sent together as one summary per chat.
+    """
+    __tablename__ = 'telegram_outbox'
+    __table_args__ = (
+        # the dispatcher polls due pending rows
+        Index('ix_telegram_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    feedback_id = Column(Integer, ForeignKey('feedbacks.id', ondelete='CASCADE'), nullable=False, index=True)
+    chat_id = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, default=OUTBOX_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    digest = Column(Boolean, nullable=False, default=False)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_error = Column(String(500), nullable=True)
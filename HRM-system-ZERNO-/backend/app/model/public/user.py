@@ -13,6 +13,8 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     active = Column(Boolean, default=False)
     role_id = Column(Integer, ForeignKey("roles.id"))
+    # carried by access tokens, bumping it revokes every token issued before
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     role = relationship('Role', back_populates='users')
     registration_requests = relationship('RegistrationRequest', back_populates='admin', uselist=False)
@@ -1,10 +1,14 @@
 from app.db.db import Base
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Integer, String, Index
 from sqlalchemy.orm import relationship
 
 
 class WaiterScore(Base):
     __tablename__ = 'waiter_scores'
+    __table_args__ = (
+        # per waiter comment pages join back to feedbacks by feedback_id
+        Index('ix_waiter_scores_waiter_id_feedback_id', 'waiter_id', 'feedback_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     score = Column(Integer, nullable=False)
@@ -0,0 +1,17 @@
+from app.db.db import Base
+from sqlalchemy import Column, Date, ForeignKey, Integer
+
+
+class WaiterScoreDaily(Base):
+    """
+    Daily rollup of waiter_scores, maintained in the same transaction as feedback writes.
+    """
+    __tablename__ = 'waiter_score_daily'
+    
+    waiter_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey('categories.id'), primary_key=True)
+    tag_id = Column(Integer, ForeignKey('tags.id'), primary_key=True)
+    feedback_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    score_count = Column(Integer, nullable=False, default=0)
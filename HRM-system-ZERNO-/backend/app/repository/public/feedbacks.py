@@ -1,20 +1,99 @@
 from sqlalchemy.future import select
-from app.model import Feedback, WaiterScore
+from sqlalchemy import func, literal_column, tuple_, exists, insert, literal, values, column, Integer, String
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from app.model import Feedback, WaiterScore, Rating, Contact
 from app.repository.base import BaseRepository
 from app.schema.emps.feedbacks import FeedbackCreate, FeedbackUpdate
 from sqlalchemy.orm import joinedload, selectinload
-import datetime 
+from typing import AsyncIterator
+import datetime
+
+
 class FeedbackRepository(BaseRepository):
 
-    async def get_all_feedbacks(self) -> list[Feedback]:
-        result = await self.connection.execute(
+    async def get_all_feedbacks(
+        self,
+        limit: int | None = 50,
+        after: tuple[datetime.datetime, int] = None,
+        waiter_id: int = None,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        has_contact: bool = None,
+        has_comment: bool = None
+    ) -> list[Feedback]:
+        """
+        One page of feedbacks, newest first, ordered by (created_at, id), limit None returns all of them.
+        after is the (created_at, id) of the last row of the previous page,
+        the row comparison walks ix_feedbacks_created_at_id so deep pages cost the same as the first one.
+        """
+        query = (
             select(Feedback)
             .options(joinedload(Feedback.waiter_score), joinedload(Feedback.contact), selectinload(Feedback.ratings))
-            .order_by(Feedback.created_at.desc())
+        )
+        filters = []
+        if after:
+            filters.append(tuple_(Feedback.created_at, Feedback.id) < tuple_(*after))
+        if start_date:
+            filters.append(Feedback.created_at >= start_date)
+        if end_date:
+            filters.append(Feedback.created_at <= end_date)
+        if waiter_id:
+            filters.append(
+                exists().where(WaiterScore.feedback_id == Feedback.id, WaiterScore.waiter_id == waiter_id)
+            )
+        if has_contact is not None:
+            contact_exists = exists().where(Contact.feedback_id == Feedback.id)
+            filters.append(contact_exists if has_contact else ~contact_exists)
+        if has_comment is not None:
+            comment_exists = exists().where(
+                WaiterScore.feedback_id == Feedback.id,
+                WaiterScore.comment.is_not(None),
+                WaiterScore.comment != ""
+            )
+            filters.append(comment_exists if has_comment else ~comment_exists)
+        
+        if filters:
+            query = query.where(*filters)
+        
+        result = await self.connection.execute(
+            query
+            .order_by(Feedback.created_at.desc(), Feedback.id.desc())
+            .limit(limit)
         )
         feedbacks = result.unique().scalars().all()
         return list(feedbacks)
 
+    async def stream_feedbacks(
+        self,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[list[Feedback]]:
+        """
+        Yield feedbacks in batches of batch_size from a server side cursor, oldest first.
+        Must be iterated inside a transaction. Each batch is expunged once the caller is done with it,
+        so memory does not grow with the table.
+        """
+        query = (
+            select(Feedback)
+            .options(joinedload(Feedback.waiter_score), joinedload(Feedback.contact), selectinload(Feedback.ratings))
+            .order_by(Feedback.created_at, Feedback.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if start_date:
+            query = query.where(Feedback.created_at >= start_date)
+        if end_date:
+            query = query.where(Feedback.created_at <= end_date)
+        
+        result = await self.connection.stream_scalars(query)
+        try:
+            async for feedbacks in result.partitions():
+                yield feedbacks
+                for feedback in feedbacks:
+                    self.connection.expunge(feedback)
+        finally:
+            await result.close()
+
     async def get_feedback_by_id(self, feedback_id: int) -> Feedback | None:
         result = await self.connection.execute(
             select(Feedback)
@@ -28,50 +107,181 @@ class FeedbackRepository(BaseRepository):
         feedback = result.unique().scalar_one()
         return feedback
 
+    async def get_feedbacks_by_ids(self, feedback_ids: list[int]) -> list[Feedback]:
+        """
+        Feedbacks with waiter score, waiter, contact and ratings in one joined query
+        """
+        if not feedback_ids:
+            return []
+        result = await self.connection.execute(
+            select(Feedback)
+            .options(
+                joinedload(Feedback.waiter_score).joinedload(WaiterScore.user),
+                joinedload(Feedback.contact),
+                joinedload(Feedback.ratings)
+            )
+            .where(Feedback.id.in_(feedback_ids))
+        )
+        feedbacks = {feedback.id: feedback for feedback in result.unique().scalars().all()}
+        return [feedbacks[feedback_id] for feedback_id in feedback_ids if feedback_id in feedbacks]
+
     async def get_waiter_feedback_comments_by_date_pagination(
         self,
-        cursor: int = 0,
+        after: tuple[datetime.datetime, int] = None,
         limit: int = 5,
         waiter_id: int = None,
         start_date: datetime.datetime = None,
         end_date: datetime.datetime = None,
-        ascending: bool = False
-    ) -> dict:
-        # Build a query selecting only the comment and the feedback id (for pagination)
+        ascending: bool = False,
+        with_comment: bool = False
+    ) -> list[dict]:
+        """
+        One page of comments ordered by (created_at, id).
+        after is the (created_at, id) of the last row of the previous page.
+        """
+        # Build a query selecting only the comment and the feedback keyset (for pagination)
         query = (
-            select(WaiterScore.comment, Feedback.id)
+            select(WaiterScore.comment, Feedback.id, Feedback.created_at)
             .join(WaiterScore, Feedback.waiter_score)
         )
         filters = []
-        if cursor and ascending:
-            filters.append(Feedback.id > cursor)
-        elif cursor and not ascending:
-            filters.append(Feedback.id < cursor)
+        if after:
+            keyset = tuple_(Feedback.created_at, Feedback.id)
+            filters.append(keyset > tuple_(*after) if ascending else keyset < tuple_(*after))
         if waiter_id:
             filters.append(WaiterScore.waiter_id == waiter_id)
         if start_date:
             filters.append(Feedback.created_at >= start_date)
         if end_date:
             filters.append(Feedback.created_at <= end_date)
+        if with_comment:
+            filters.append(WaiterScore.comment.is_not(None))
+            filters.append(WaiterScore.comment != "")
 
         if filters:
             query = query.where(*filters)
 
         if ascending:
-            query = query.order_by(Feedback.created_at)
+            query = query.order_by(Feedback.created_at, Feedback.id)
         else:
-            query = query.order_by(Feedback.created_at.desc())
+            query = query.order_by(Feedback.created_at.desc(), Feedback.id.desc())
 
         # Execute the query with limit for pagination
         result = await self.connection.execute(query.limit(limit))
-        rows = result.all()
-        # Extract both the comments and their corresponding feedback id
-        feedbacks = [{"id": row[1], "comment": row[0]} for row in rows]
+        return [
+            {"id": id, "comment": comment, "created_at": created_at}
+            for comment, id, created_at in result.all()
+        ]
 
-        # Use the feedback id from the last row as the new cursor for pagination
-        next_cursor = rows[-1][1] if rows else None
-            
-        return {"feedbacks": feedbacks, "cursor": next_cursor}
+    async def get_feedback_series(
+        self,
+        granularity: str,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        waiter_id: int = None,
+        feedback_type_id: int = None
+    ) -> list[dict]:
+        # granularity is validated by the caller, so it is safe to inline
+        unit = literal_column(f"'{granularity}'")
+        
+        buckets = (
+            select(
+                func.generate_series(
+                    func.date_trunc(unit, start_date),
+                    func.date_trunc(unit, end_date),
+                    literal_column(f"interval '1 {granularity}'")
+                ).label("bucket")
+            )
+            .subquery("buckets")
+        )
+        
+        feedback_bucket = func.date_trunc(unit, Feedback.created_at).label("bucket")
+        window = [Feedback.created_at >= start_date, Feedback.created_at <= end_date]
+        if waiter_id:
+            window.append(WaiterScore.waiter_id == waiter_id)
+        
+        # feedback level: one row per feedback, so counts and score averages are not multiplied by ratings
+        feedbacks = (
+            select(
+                feedback_bucket,
+                func.count(Feedback.id).label("feedbacks"),
+                func.avg(WaiterScore.score).label("avg_score")
+            )
+            .outerjoin(WaiterScore, WaiterScore.feedback_id == Feedback.id)
+            .where(*window)
+            .group_by(feedback_bucket)
+            .subquery("feedback_stats")
+        )
+        
+        rating_filters = list(window)
+        if feedback_type_id:
+            rating_filters.append(Rating.feedback_type_id == feedback_type_id)
+        ratings = (
+            select(
+                feedback_bucket,
+                func.count(Rating.id).label("ratings"),
+                func.avg(Rating.rating).label("avg_rating")
+            )
+            .join(Feedback, Rating.feedback_id == Feedback.id)
+        )
+        if waiter_id:
+            ratings = ratings.join(WaiterScore, WaiterScore.feedback_id == Feedback.id)
+        ratings = (
+            ratings
+            .where(*rating_filters)
+            .group_by(feedback_bucket)
+            .subquery("rating_stats")
+        )
+        
+        query = (
+            select(
+                buckets.c.bucket,
+                func.coalesce(feedbacks.c.feedbacks, 0),
+                feedbacks.c.avg_score,
+                func.coalesce(ratings.c.ratings, 0),
+                ratings.c.avg_rating
+            )
+            .outerjoin(feedbacks, feedbacks.c.bucket == buckets.c.bucket)
+            .outerjoin(ratings, ratings.c.bucket == buckets.c.bucket)
+            .order_by(buckets.c.bucket)
+        )
+        result = await self.connection.execute(query)
+        return [
+            {
+                "bucket": bucket,
+                "feedbacks": feedbacks_count,
+                "avg_score": round(float(avg_score), 2) if avg_score is not None else None,
+                "ratings": ratings_count,
+                "avg_rating": round(float(avg_rating), 2) if avg_rating is not None else None
+            }
+            for bucket, feedbacks_count, avg_score, ratings_count, avg_rating in result.all()
+        ]
+
+    async def get_ratings_heatmap(
+        self,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        feedback_type_id: int = None
+    ) -> list[tuple[int, int, int, float]]:
+        # isodow is 1 (Monday) .. 7 (Sunday)
+        weekday = func.extract("isodow", Feedback.created_at).label("weekday")
+        hour = func.extract("hour", Feedback.created_at).label("hour")
+        
+        filters = [Feedback.created_at >= start_date, Feedback.created_at <= end_date]
+        if feedback_type_id:
+            filters.append(Rating.feedback_type_id == feedback_type_id)
+        
+        query = (
+            select(weekday, hour, func.count(Rating.id), func.avg(Rating.rating))
+            .join(Feedback, Rating.feedback_id == Feedback.id)
+            .where(*filters)
+            .group_by(weekday, hour)
+        )
+        result = await self.connection.execute(query)
+        return [
+            (int(weekday) - 1, int(hour), count, float(avg_rating))
+            for weekday, hour, count, avg_rating in result.all()
+        ]
 
     async def create_feedback(self, feedback_create: FeedbackCreate) -> Feedback:
         feedback = Feedback(**feedback_create.model_dump(), created_at=datetime.datetime.now())
@@ -80,6 +290,166 @@ class FeedbackRepository(BaseRepository):
         await self.connection.refresh(feedback)
         return feedback
 
+    async def create_complete_feedback(self, feedback: Feedback, also: list = ()) -> Feedback:
+        """
+        Insert a transient feedback with its waiter score, contact and ratings in a single statement,
+        each insert is a data-modifying CTE on top of the new feedback row.
+        Statements in also (e.g. the rollup upsert) run as further CTEs of the same statement,
+        a callable in also is called with the new feedback id column first, for inserts that reference it.
+        The returned ids and rating rows are set on the passed objects, they are not added to the session.
+        """
+        new_feedback = (
+            insert(Feedback)
+            .values(created_at=feedback.created_at, is_notified=feedback.is_notified)
+            .returning(Feedback.id)
+            .cte("new_feedback")
+        )
+        columns = [new_feedback.c.id]
+        
+        score = feedback.waiter_score
+        if score:
+            new_score = (
+                insert(WaiterScore)
+                .from_select(
+                    ["feedback_id", "waiter_id", "score", "comment", "tag_id", "category_id"],
+                    select(
+                        new_feedback.c.id,
+                        literal(score.waiter_id, Integer),
+                        literal(score.score, Integer),
+                        literal(score.comment, String),
+                        literal(score.tag_id, Integer),
+                        literal(score.category_id, Integer)
+                    )
+                )
+                .returning(WaiterScore.id)
+                .cte("new_waiter_score")
+            )
+            columns.append(select(new_score.c.id).scalar_subquery())
+        
+        contact = feedback.contact
+        if contact:
+            new_contact = (
+                insert(Contact)
+                .from_select(["feedback_id", "phone"], select(new_feedback.c.id, literal(contact.phone, String)))
+                .returning(Contact.id)
+                .cte("new_contact")
+            )
+            columns.append(select(new_contact.c.id).scalar_subquery())
+        
+        if feedback.ratings:
+            rating_values = values(
+                column("rating", Integer),
+                column("feedback_type_id", Integer),
+                name="rating_values"
+            ).data([(rating.rating, rating.feedback_type_id) for rating in feedback.ratings])
+            new_ratings = (
+                insert(Rating)
+                .from_select(
+                    ["feedback_id", "rating", "feedback_type_id"],
+                    select(new_feedback.c.id, rating_values.c.rating, rating_values.c.feedback_type_id)
+                )
+                .returning(Rating.id, Rating.rating, Rating.feedback_type_id)
+                .cte("new_ratings")
+            )
+            # the ratings are rebuilt from the returned rows, one array per column in the same order
+            for rating_column in (new_ratings.c.id, new_ratings.c.rating, new_ratings.c.feedback_type_id):
+                columns.append(
+                    select(func.array_agg(aggregate_order_by(rating_column, new_ratings.c.id))).scalar_subquery()
+                )
+        
+        query = select(*columns)
+        # data-modifying CTEs run even when the final SELECT does not read them
+        for index, statement in enumerate(also):
+            if callable(statement):
+                statement = statement(new_feedback.c.id)
+            if statement is not None:
+                query = query.add_cte(statement.cte(f"also_{index}"))
+        
+        result = await self.connection.execute(query)
+        row = iter(result.one())
+        
+        feedback.id = next(row)
+        if score:
+            score.id = next(row)
+            score.feedback_id = feedback.id
+        if contact:
+            contact.id = next(row)
+            contact.feedback_id = feedback.id
+        if feedback.ratings:
+            ids, ratings, feedback_type_ids = next(row), next(row), next(row)
+            feedback.ratings = [
+                Rating(id=rating_id, rating=rating, feedback_type_id=feedback_type_id, feedback_id=feedback.id)
+                for rating_id, rating, feedback_type_id in zip(ids, ratings, feedback_type_ids)
+            ]
+        return feedback
+
+    async def bulk_create_feedbacks(self, feedbacks: list[Feedback]) -> list[Feedback]:
+        """
+        Insert transient feedbacks with their waiter score, contact and ratings,
+        one multi-row INSERT ... RETURNING per table.
+        The generated ids are set on the passed objects, they are not added to the session.
+        """
+        if not feedbacks:
+            return feedbacks
+        
+        result = await self.connection.execute(
+            insert(Feedback).returning(Feedback.id, sort_by_parameter_order=True),
+            [{"created_at": feedback.created_at, "is_notified": feedback.is_notified} for feedback in feedbacks]
+        )
+        for feedback, feedback_id in zip(feedbacks, result.scalars().all()):
+            feedback.id = feedback_id
+        
+        waiter_scores = [feedback.waiter_score for feedback in feedbacks if feedback.waiter_score]
+        contacts = [feedback.contact for feedback in feedbacks if feedback.contact]
+        ratings = [rating for feedback in feedbacks for rating in feedback.ratings]
+        for feedback in feedbacks:
+            for child in [feedback.waiter_score, feedback.contact, *feedback.ratings]:
+                if child is not None:
+                    child.feedback_id = feedback.id
+        
+        if waiter_scores:
+            result = await self.connection.execute(
+                insert(WaiterScore).returning(WaiterScore.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "feedback_id": score.feedback_id,
+                        "waiter_id": score.waiter_id,
+                        "score": score.score,
+                        "comment": score.comment,
+                        "tag_id": score.tag_id,
+                        "category_id": score.category_id
+                    }
+                    for score in waiter_scores
+                ]
+            )
+            for score, score_id in zip(waiter_scores, result.scalars().all()):
+                score.id = score_id
+        
+        if contacts:
+            result = await self.connection.execute(
+                insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+                [{"feedback_id": contact.feedback_id, "phone": contact.phone} for contact in contacts]
+            )
+            for contact, contact_id in zip(contacts, result.scalars().all()):
+                contact.id = contact_id
+        
+        if ratings:
+            result = await self.connection.execute(
+                insert(Rating).returning(Rating.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "feedback_id": rating.feedback_id,
+                        "rating": rating.rating,
+                        "feedback_type_id": rating.feedback_type_id
+                    }
+                    for rating in ratings
+                ]
+            )
+            for rating, rating_id in zip(ratings, result.scalars().all()):
+                rating.id = rating_id
+        
+        return feedbacks
+
     async def update_feedback(self, feedback: Feedback, feedback_update: FeedbackUpdate) -> Feedback:
         update_fields = feedback_update.model_dump(exclude_unset=True)
         for field, value in update_fields.items():
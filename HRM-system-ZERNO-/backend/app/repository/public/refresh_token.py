@@ -0,0 +1,57 @@
+import datetime
+from sqlalchemy import select, update, delete, insert
+from app.model import RefreshToken
+from app.repository.base import BaseRepository
+
+
+class RefreshTokenRepository(BaseRepository):
+
+    async def create_refresh_token(
+        self,
+        user_id: int,
+        family_id: str,
+        token_hash: str,
+        token_version: int,
+        expires_at: datetime.datetime
+    ) -> None:
+        await self.connection.execute(
+            insert(RefreshToken).values(
+                user_id=user_id,
+                family_id=family_id,
+                token_hash=token_hash,
+                token_version=token_version,
+                expires_at=expires_at,
+                created_at=datetime.datetime.utcnow()
+            )
+        )
+
+    async def use_refresh_token(self, token_hash: str) -> RefreshToken | None:
+        """
+        Mark an unused token as used and return it. None when it does not exist or was already used,
+        also when a concurrent request used it first.
+        """
+        result = await self.connection.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.used_at.is_(None))
+            .values(used_at=datetime.datetime.utcnow())
+            .returning(RefreshToken)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalars().first()
+
+    async def get_refresh_token(self, token_hash: str) -> RefreshToken | None:
+        result = await self.connection.execute(
+            select(RefreshToken).where(RefreshToken.token_hash == token_hash)
+        )
+        return result.scalars().first()
+
+    async def delete_family(self, family_id: str) -> None:
+        await self.connection.execute(
+            delete(RefreshToken).where(RefreshToken.family_id == family_id)
+        )
+
+    async def delete_expired(self, now: datetime.datetime) -> int:
+        result = await self.connection.execute(
+            delete(RefreshToken).where(RefreshToken.expires_at < now)
+        )
+        return result.rowcount
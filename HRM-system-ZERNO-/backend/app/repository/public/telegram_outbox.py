@@ -0,0 +1,128 @@
+import datetime
+from sqlalchemy import select, update, delete, func, insert, literal, values, column, or_, and_, String, Boolean
+from app.model import TelegramOutbox
+from app.model.public.telegram_outbox import OUTBOX_PENDING, OUTBOX_FAILED
+from app.repository.base import BaseRepository
+
+
+class TelegramOutboxRepository(BaseRepository):
+
+    async def enqueue(
+        self,
+        feedback_ids: list[int],
+        chat_ids: list[str],
+        held: set[int] = frozenset(),
+        hold_until: datetime.datetime = None
+    ) -> None:
+        """
+        One pending row per feedback and chat, must run in the transaction that writes the feedbacks.
+        Feedbacks in held become digest rows that wait until hold_until.
+        """
+        if not feedback_ids or not chat_ids:
+            return
+        now = datetime.datetime.now()
+        await self.connection.execute(
+            insert(TelegramOutbox),
+            [
+                {
+                    "feedback_id": feedback_id,
+                    "chat_id": chat_id,
+                    "status": OUTBOX_PENDING,
+                    "attempts": 0,
+                    "digest": feedback_id in held,
+                    "next_attempt_at": hold_until if feedback_id in held else now,
+                    "created_at": now
+                }
+                for feedback_id in feedback_ids
+                for chat_id in chat_ids
+            ]
+        )
+
+    @staticmethod
+    def enqueue_statement(feedback_id, chat_ids: list[str], hold_until: datetime.datetime = None):
+        """
+        The insert behind enqueue for a feedback id that is a column of another statement,
+        e.g. a CTE of FeedbackRepository.create_complete_feedback. None when there are no chats.
+        """
+        if not chat_ids:
+            return None
+        now = datetime.datetime.now()
+        chats = values(column("chat_id", String), name="outbox_chats").data([(chat_id,) for chat_id in chat_ids])
+        return insert(TelegramOutbox).from_select(
+            ["feedback_id", "chat_id", "status", "attempts", "digest", "next_attempt_at", "created_at"],
+            select(
+                feedback_id,
+                chats.c.chat_id,
+                literal(OUTBOX_PENDING, String),
+                literal(0),
+                literal(hold_until is not None, Boolean),
+                literal(hold_until or now),
+                literal(now)
+            )
+        )
+
+    async def claim_due(self, limit: int, lease: datetime.timedelta, digest_max_items: int = None) -> list[TelegramOutbox]:
+        """
+        Take up to limit due rows, oldest first, and push their next attempt lease into the future,
+        so that other dispatchers skip them while they are being sent.
+        A chat with a due row, or with digest_max_items held digest rows, has all of its held rows taken with it.
+        Must be committed before sending.
+        """
+        now = datetime.datetime.now()
+        is_due = and_(TelegramOutbox.status == OUTBOX_PENDING, TelegramOutbox.next_attempt_at <= now)
+        # digest rows that were never attempted are waiting for their chat to be flushed
+        is_held = and_(
+            TelegramOutbox.status == OUTBOX_PENDING,
+            TelegramOutbox.digest.is_(True),
+            TelegramOutbox.attempts == 0
+        )
+        flush_chats = select(TelegramOutbox.chat_id).where(is_due)
+        if digest_max_items:
+            flush_chats = flush_chats.union(
+                select(TelegramOutbox.chat_id)
+                .where(is_held)
+                .group_by(TelegramOutbox.chat_id)
+                .having(func.count(TelegramOutbox.id) >= digest_max_items)
+            )
+        due = (
+            select(TelegramOutbox.id)
+            .where(or_(is_due, is_held), TelegramOutbox.chat_id.in_(flush_chats.scalar_subquery()))
+            .order_by(TelegramOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.connection.execute(
+            update(TelegramOutbox)
+            .where(TelegramOutbox.id.in_(due.scalar_subquery()))
+            .values(next_attempt_at=now + lease, attempts=TelegramOutbox.attempts + 1)
+            .returning(TelegramOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(result.scalars().all(), key=lambda row: row.id)
+
+    async def delete_sent(self, ids: list[int]) -> None:
+        if ids:
+            await self.connection.execute(delete(TelegramOutbox).where(TelegramOutbox.id.in_(ids)))
+
+    async def reschedule(self, ids: list[int], next_attempt_at: datetime.datetime, error: str) -> None:
+        if ids:
+            await self.connection.execute(
+                update(TelegramOutbox)
+                .where(TelegramOutbox.id.in_(ids))
+                .values(next_attempt_at=next_attempt_at, last_error=error[:500])
+            )
+
+    async def mark_failed(self, ids: list[int], error: str) -> None:
+        if ids:
+            await self.connection.execute(
+                update(TelegramOutbox)
+                .where(TelegramOutbox.id.in_(ids))
+                .values(status=OUTBOX_FAILED, last_error=error[:500])
+            )
+
+    async def count_by_status(self) -> dict[str, int]:
+        result = await self.connection.execute(
+            select(TelegramOutbox.status, func.count(TelegramOutbox.id))
+            .group_by(TelegramOutbox.status)
+        )
+        return {status: count for status, count in result.all()}
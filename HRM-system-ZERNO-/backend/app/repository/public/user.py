@@ -1,4 +1,4 @@
-from sqlalchemy import desc
+from sqlalchemy import desc, update
 from app.repository.base import BaseRepository
 from sqlalchemy.future import select
 from app.model import User
@@ -61,6 +61,24 @@ class UserRepository(BaseRepository):
         user = result.scalars().first()
         return user
     
+    async def get_existing_user_ids(self, user_ids: set[int]) -> set[int]:
+        if not user_ids:
+            return set()
+        result = await self.connection.execute(
+            select(User.id)
+            .filter(User.id.in_(user_ids))
+        )
+        return set(result.scalars().all())
+    
+    async def get_user_names(self, user_ids: set[int]) -> dict[int, tuple[str, str]]:
+        if not user_ids:
+            return {}
+        result = await self.connection.execute(
+            select(User.id, User.first_name, User.second_name)
+            .filter(User.id.in_(user_ids))
+        )
+        return {user_id: (first_name, second_name) for user_id, first_name, second_name in result.all()}
+    
     async def create_user(self, user_create):
         user = User(**user_create.model_dump())
         self.connection.add(user)
@@ -78,6 +96,14 @@ class UserRepository(BaseRepository):
         await self.connection.refresh(user)
         return user
     
+    async def update_password_hash(self, user_id: int, hashed_password: str) -> None:
+        await self.connection.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(hashed_password=hashed_password)
+            .execution_options(synchronize_session=False)
+        )
+    
     async def delete_user(self, user):
         await self.connection.delete(user)
         await self.connection.flush()
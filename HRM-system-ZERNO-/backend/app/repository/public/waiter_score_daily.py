@@ -0,0 +1,220 @@
+import datetime
+from sqlalchemy import select, func, and_, cast, delete, text, Float
+from sqlalchemy.dialects.postgresql import insert, Insert
+from app.model import WaiterScoreDaily, WaiterScore, Feedback, Category, Tag, User, Role
+from app.model.public.category import POSITIVE_CATEGORY, NEUTRAL_CATEGORY, NEGATIVE_CATEGORY
+from app.model.public.role import WAITER_ROLE
+from app.repository.base import BaseRepository
+
+
+class WaiterScoreDailyRepository(BaseRepository):
+
+    async def apply_scores(
+        self,
+        scores: list[tuple[datetime.date, WaiterScore]],
+        sign: int = 1
+    ) -> None:
+        """
+        Add (sign=1) or subtract (sign=-1) waiter scores from the rollup with one upsert.
+        Must be called inside the transaction that writes the scores.
+        """
+        query = self.apply_scores_statement(scores, sign)
+        if query is not None:
+            await self.connection.execute(query)
+
+    @staticmethod
+    def apply_scores_statement(
+        scores: list[tuple[datetime.date, WaiterScore]],
+        sign: int = 1
+    ) -> Insert | None:
+        """
+        The upsert behind apply_scores, for callers that run it as part of another statement.
+        None when there is nothing to apply.
+        """
+        rows = {}
+        for day, score in scores:
+            key = (score.waiter_id, day, score.category_id, score.tag_id)
+            row = rows.setdefault(key, {
+                "waiter_id": score.waiter_id,
+                "day": day,
+                "category_id": score.category_id,
+                "tag_id": score.tag_id,
+                "feedback_count": 0,
+                "score_sum": 0,
+                "score_count": 0
+            })
+            row["feedback_count"] += sign
+            row["score_sum"] += sign * score.score
+            row["score_count"] += sign
+
+        if not rows:
+            return None
+
+        query = insert(WaiterScoreDaily).values(list(rows.values()))
+        return query.on_conflict_do_update(
+            index_elements=[
+                WaiterScoreDaily.waiter_id,
+                WaiterScoreDaily.day,
+                WaiterScoreDaily.category_id,
+                WaiterScoreDaily.tag_id
+            ],
+            set_={
+                "feedback_count": WaiterScoreDaily.feedback_count + query.excluded.feedback_count,
+                "score_sum": WaiterScoreDaily.score_sum + query.excluded.score_sum,
+                "score_count": WaiterScoreDaily.score_count + query.excluded.score_count
+            }
+        )
+
+    async def get_count_records_by_category(self, waiter_id: int) -> dict:
+        total = func.coalesce(func.sum(WaiterScoreDaily.feedback_count), 0)
+        query = (
+            select(
+                total.label("total"),
+                func.coalesce(
+                    func.sum(WaiterScoreDaily.feedback_count).filter(Category.category == POSITIVE_CATEGORY), 0
+                ).label("positive"),
+                func.coalesce(
+                    func.sum(WaiterScoreDaily.feedback_count).filter(Category.category == NEUTRAL_CATEGORY), 0
+                ).label("neutral"),
+                func.coalesce(
+                    func.sum(WaiterScoreDaily.feedback_count).filter(Category.category == NEGATIVE_CATEGORY), 0
+                ).label("negative")
+            )
+            .join(Category, WaiterScoreDaily.category_id == Category.id)
+            .where(WaiterScoreDaily.waiter_id == waiter_id)
+        )
+        result = await self.connection.execute(query)
+        counts = result.one()
+        return {key: int(value) for key, value in counts._mapping.items()}
+
+    async def get_count_records_by_tags(self, waiter_id: int) -> list[tuple[str, str, int]]:
+        # LEFT JOIN from tags so that tags without any score are counted as 0
+        query = (
+            select(
+                Category.category,
+                Tag.tag,
+                func.coalesce(func.sum(WaiterScoreDaily.feedback_count), 0)
+            )
+            .select_from(Tag)
+            .join(Category, Tag.category_id == Category.id)
+            .outerjoin(
+                WaiterScoreDaily,
+                and_(
+                    WaiterScoreDaily.tag_id == Tag.id,
+                    WaiterScoreDaily.waiter_id == waiter_id
+                )
+            )
+            .where(Category.category.in_([POSITIVE_CATEGORY, NEUTRAL_CATEGORY, NEGATIVE_CATEGORY]))
+            .group_by(Category.category, Tag.id, Tag.tag)
+            .order_by(Tag.id)
+        )
+        result = await self.connection.execute(query)
+        return [(category, tag, int(count)) for category, tag, count in result.all()]
+
+    async def get_leaderboard(
+        self,
+        start_day: datetime.date,
+        end_day: datetime.date,
+        metric: str = "csat",
+        top_k: int = 10,
+        min_feedbacks: int = 1
+    ) -> list[dict]:
+        feedbacks = func.coalesce(func.sum(WaiterScoreDaily.feedback_count), 0)
+        positive = func.coalesce(
+            func.sum(WaiterScoreDaily.feedback_count).filter(Category.category == POSITIVE_CATEGORY), 0
+        )
+        avg_score = (
+            cast(func.sum(WaiterScoreDaily.score_sum), Float)
+            / cast(func.nullif(func.sum(WaiterScoreDaily.score_count), 0), Float)
+        )
+        csat = cast(positive, Float) * 100 / cast(func.nullif(feedbacks, 0), Float)
+        
+        ranks = {
+            "csat": func.rank().over(order_by=csat.desc().nulls_last()).label("csat_rank"),
+            "avg_score": func.rank().over(order_by=avg_score.desc().nulls_last()).label("avg_score_rank"),
+            "feedbacks": func.rank().over(order_by=feedbacks.desc()).label("feedbacks_rank")
+        }
+        
+        # every waiter is listed, the period filter lives in the join condition
+        query = (
+            select(
+                User.id,
+                User.first_name,
+                User.second_name,
+                feedbacks.label("feedbacks"),
+                csat.label("csat"),
+                avg_score.label("avg_score"),
+                ranks["csat"],
+                ranks["avg_score"],
+                ranks["feedbacks"]
+            )
+            .join(Role, User.role_id == Role.id)
+            .outerjoin(
+                WaiterScoreDaily,
+                and_(
+                    WaiterScoreDaily.waiter_id == User.id,
+                    WaiterScoreDaily.day >= start_day,
+                    WaiterScoreDaily.day <= end_day
+                )
+            )
+            .outerjoin(Category, WaiterScoreDaily.category_id == Category.id)
+            .where(Role.role == WAITER_ROLE)
+            .group_by(User.id, User.first_name, User.second_name)
+            .having(feedbacks >= min_feedbacks)
+            .order_by(ranks[metric], User.id)
+            .limit(top_k)
+        )
+        result = await self.connection.execute(query)
+        return [
+            {
+                "waiter_id": row.id,
+                "first_name": row.first_name,
+                "second_name": row.second_name,
+                "feedbacks": int(row.feedbacks),
+                "CSAT": round(row.csat, 1) if row.csat is not None else None,
+                "avg_score": round(row.avg_score, 2) if row.avg_score is not None else None,
+                "rank": {
+                    "CSAT": row.csat_rank,
+                    "avg_score": row.avg_score_rank,
+                    "feedbacks": row.feedbacks_rank
+                }
+            }
+            for row in result.all()
+        ]
+
+    async def rebuild(self) -> None:
+        """
+        Recompute the whole rollup from waiter_scores.
+        The exclusive lock makes concurrent feedback writes wait until the rebuild commits.
+        """
+        await self.connection.execute(text("LOCK TABLE waiter_score_daily IN EXCLUSIVE MODE"))
+        await self.connection.execute(delete(WaiterScoreDaily))
+
+        day = func.coalesce(func.date(Feedback.created_at), func.current_date())
+        source = (
+            select(
+                WaiterScore.waiter_id,
+                day,
+                WaiterScore.category_id,
+                WaiterScore.tag_id,
+                func.count(WaiterScore.id),
+                func.sum(WaiterScore.score),
+                func.count(WaiterScore.score)
+            )
+            .join(Feedback, WaiterScore.feedback_id == Feedback.id)
+            .group_by(WaiterScore.waiter_id, day, WaiterScore.category_id, WaiterScore.tag_id)
+        )
+        await self.connection.execute(
+            insert(WaiterScoreDaily).from_select(
+                [
+                    WaiterScoreDaily.waiter_id,
+                    WaiterScoreDaily.day,
+                    WaiterScoreDaily.category_id,
+                    WaiterScoreDaily.tag_id,
+                    WaiterScoreDaily.feedback_count,
+                    WaiterScoreDaily.score_sum,
+                    WaiterScoreDaily.score_count
+                ],
+                source
+            )
+        )
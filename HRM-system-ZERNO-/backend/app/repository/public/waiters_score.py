@@ -1,5 +1,6 @@
-from sqlalchemy import select, func
-from app.model import WaiterScore
+from sqlalchemy import select, func, and_
+from app.model import WaiterScore, Category, Tag
+from app.model.public.category import POSITIVE_CATEGORY, NEUTRAL_CATEGORY, NEGATIVE_CATEGORY
 from app.repository.base import BaseRepository
 from app.schema.emps.waiters_score import WaiterScoreCreate, WaiterScoreUpdate
 
@@ -39,6 +40,42 @@ class WaiterScoreRepository(BaseRepository):
         count = result.scalar_one()
         return count
     
+    async def get_count_records_by_category(self, waiter_id: int) -> dict:
+        total = func.count(WaiterScore.id)
+        query = (
+            select(
+                total.label("total"),
+                total.filter(Category.category == POSITIVE_CATEGORY).label("positive"),
+                total.filter(Category.category == NEUTRAL_CATEGORY).label("neutral"),
+                total.filter(Category.category == NEGATIVE_CATEGORY).label("negative")
+            )
+            .join(Category, WaiterScore.category_id == Category.id)
+            .where(WaiterScore.waiter_id == waiter_id)
+        )
+        result = await self.connection.execute(query)
+        counts = result.one()
+        return dict(counts._mapping)
+    
+    async def get_count_records_by_tags(self, waiter_id: int) -> list[tuple[str, str, int]]:
+        # LEFT JOIN from tags so that tags without any score are counted as 0
+        query = (
+            select(Category.category, Tag.tag, func.count(WaiterScore.id))
+            .select_from(Tag)
+            .join(Category, Tag.category_id == Category.id)
+            .outerjoin(
+                WaiterScore,
+                and_(
+                    WaiterScore.tag_id == Tag.id,
+                    WaiterScore.waiter_id == waiter_id
+                )
+            )
+            .where(Category.category.in_([POSITIVE_CATEGORY, NEUTRAL_CATEGORY, NEGATIVE_CATEGORY]))
+            .group_by(Category.category, Tag.id, Tag.tag)
+            .order_by(Tag.id)
+        )
+        result = await self.connection.execute(query)
+        return [tuple(row) for row in result.all()]
+    
     async def create_waiter(self, waiter_create: WaiterScoreCreate) -> WaiterScore:
         waiter = WaiterScore(**waiter_create.model_dump())
         self.connection.add(waiter)
@@ -12,6 +12,20 @@ class TokenCreate(BaseModel):
             "password": "adi123123"
         }
 
+class TokenClaims(BaseModel):
+    """
+    Signed claims of an access token, ver has to match the user's token_version
+    """
+    id: int
+    role: str | None = None
+    ver: int = 0
+
+
 class TokenResponse(BaseModel):
     access_token: str
-    token_type: str = "bearer"
\ No newline at end of file
+    refresh_token: str | None = None
+    token_type: str = "bearer"
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
\ No newline at end of file
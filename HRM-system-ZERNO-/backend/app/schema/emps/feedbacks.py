@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from .contacts import ContactResponse
 from .waiters_score import WaiterScoreResponse, WaiterScoreCreate
@@ -21,9 +21,23 @@ class FeedbackUpdate(FeedbackBase):
 
 
 class CompleteFeedbackCreate(FeedbackBase):
-    contact: str | None = None
+    # contacts.phone is String(100)
+    contact: str | None = Field(None, max_length=100)
     waiter_score: WaiterScoreCreate | None = None
     ratings: list[RatingCreate]
+
+
+class BulkFeedbackCreate(CompleteFeedbackCreate):
+    # kiosks replay buffered feedback, so keep the time it was left at
+    created_at: datetime | None = None
+
+    @field_validator("created_at")
+    @classmethod
+    def to_naive_local(cls, value: datetime | None) -> datetime | None:
+        # created_at is a naive local time column, an offset from the kiosk is converted rather than dropped
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
     
     
 class FeedbackResponse(FeedbackBase):
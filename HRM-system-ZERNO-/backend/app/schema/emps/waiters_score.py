@@ -1,10 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class WaiterScoreBase(BaseModel):
     waiter_id: int
     score: int
-    comment: str | None = None
+    # waiter_score.comment is String(200)
+    comment: str | None = Field(None, max_length=200)
     tag_id: int
     category_id: int
     
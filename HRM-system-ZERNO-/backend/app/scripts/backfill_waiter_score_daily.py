@@ -0,0 +1,28 @@
+"""
+Rebuild the waiter_score_daily rollup from waiter_scores.
+
+Usage:
+    poetry run python -m app.scripts.backfill_waiter_score_daily
+"""
+import asyncio
+
+from app.db.db import async_session, async_engine
+from app.repository.public.waiter_score_daily import WaiterScoreDailyRepository
+from app.service.public.waiter_score_daily import WaiterScoreDailyService
+
+
+async def main():
+    try:
+        async with async_session() as session:
+            waiter_score_daily_service = WaiterScoreDailyService(
+                session=session,
+                waiter_score_daily_repo=WaiterScoreDailyRepository(session)
+            )
+            await waiter_score_daily_service.rebuild()
+        print("waiter_score_daily rebuilt")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+from app.config import auth_user_cache_url, auth_user_cache_ttl
+from app.db.db import async_session
+from app.repository.public.user import UserRepository
+from app.schema.users.user import UserResponse
+from app.service.utils.cache import create_cache_backend
+
+# user records behind access tokens, evicted by UserService when a user's token version changes;
+# with memory:// another worker sees the change once its entry expires
+auth_user_cache = create_cache_backend(auth_user_cache_url, namespace="auth_user")
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+async def get_auth_user(user_id: int) -> dict | None:
+    """
+    UserResponse fields with role and token_version of a user, None if the user does not exist.
+    A cache miss is loaded in its own short session, so hits never check out a connection.
+    """
+    user = await auth_user_cache.get(user_key(user_id))
+    if user is None:
+        async with async_session() as session:
+            record = await UserRepository(session).get_user_by_id(user_id)
+        if record is None:
+            return None
+        user = {
+            **UserResponse.model_validate(record).model_dump(),
+            "role": record.role.role if record.role else None,
+            "token_version": record.token_version
+        }
+        await auth_user_cache.set(user_key(user_id), user, ttl=auth_user_cache_ttl)
+    return user
+
+
+async def invalidate_auth_user(user_id: int) -> None:
+    await auth_user_cache.delete(user_key(user_id))
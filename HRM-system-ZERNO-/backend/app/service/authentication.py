@@ -1,20 +1,38 @@
 from datetime import datetime, timedelta
+import hashlib
+import logging
 import secrets
 import string
+import uuid
 from fastapi import HTTPException
 
+from app.config import refresh_token_expire_days, refresh_token_sweep_interval
+from app.db.db import async_session
 from app.repository.public.password_reset import PasswordResetRepository
+from app.repository.public.refresh_token import RefreshTokenRepository
+from app.repository.public.user import UserRepository
 from app.schema.users.reset_password import PasswordResetConfirm, PasswordResetRequest
 from app.service.public.password_reset import EmailService
 from .public.user import UserService
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .utils.utils import create_access_token, verify_password, jwt_decode, pwd_context
+from .utils.utils import create_access_token, jwt_decode
+from .utils.password import password_hasher
+from .utils.periodic import PeriodicTask
 from app.model import User
-from app.schema.authentication import TokenResponse
+from app.model.public.role import ADMIN_ROLE
+from app.schema.authentication import TokenClaims, TokenResponse
+from app.service.auth_cache import get_auth_user, invalidate_auth_user
 from app.service.public.role import RoleService
 from app.schema.users.user import UserResponse 
 
+logger = logging.getLogger(__name__)
+
+
+def hash_refresh_token(token: str) -> str:
+    # refresh tokens are 256 random bits, a fast hash is enough to make a leaked table useless
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
 class AuthenticationService:
     
@@ -22,16 +40,18 @@ class AuthenticationService:
         self, 
         session: AsyncSession, 
         user_service: UserService,
-        role_service: RoleService
+        role_service: RoleService,
+        refresh_token_repo: RefreshTokenRepository
     ):
         self.session = session
         self.user_service = user_service
         self.role_service = role_service
+        self.refresh_token_repo = refresh_token_repo
         
     async def login(self, TokenCreate) -> TokenResponse:
         """
         log into the system with email and password
-        generate a jwt access token and return it
+        generate a jwt access token and a refresh token of a new family and return them
 
         Args:
             email (str)
@@ -40,48 +60,89 @@ class AuthenticationService:
         try:
             user: User = await self.user_service.get_user_by_email(TokenCreate.email)
             
-            if not verify_password(TokenCreate.password, user.hashed_password):
+            valid, new_hash = await password_hasher.verify_and_update(TokenCreate.password, user.hashed_password)
+            if not valid:
                 raise HTTPException(status_code=400, detail="Incorrect password")
+            if new_hash:
+                await self._rehash_password(user.id, new_hash)
 
-            token = create_access_token(
-                {
-                    "id": user.id,
-                    "role": (await self.role_service.get_role_by_id(user.role_id)).role
-                }
+            tokens = await self._issue_tokens(
+                user.id,
+                (await self.role_service.get_role_by_id(user.role_id)).role,
+                user.token_version,
+                family_id=str(uuid.uuid4())
             )
+            await self.session.commit()
             
-            return TokenResponse(access_token=token)
+            return tokens
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
+    
+    async def _issue_tokens(self, user_id: int, role: str, token_version: int, family_id: str) -> TokenResponse:
+        """
+        A new access token and a refresh token of family, the caller commits
+        """
+        refresh_token = secrets.token_urlsafe(32)
+        await self.refresh_token_repo.create_refresh_token(
+            user_id=user_id,
+            family_id=family_id,
+            token_hash=hash_refresh_token(refresh_token),
+            token_version=token_version,
+            expires_at=datetime.utcnow() + timedelta(days=refresh_token_expire_days)
+        )
+        access_token = create_access_token({"id": user_id, "role": role, "ver": token_version})
+        return TokenResponse(access_token=access_token, refresh_token=refresh_token)
+        
+    @staticmethod
+    async def _rehash_password(user_id: int, hashed_password: str) -> None:
+        """
+        Save a hash made with the current bcrypt cost, failing to do so must not fail the login.
+        It is written in a session of its own, a failure leaves the login's session and its user untouched.
+        """
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    await UserRepository(session).update_password_hash(user_id, hashed_password)
+            await invalidate_auth_user(user_id)
+        except Exception:
+            logger.exception("Failed to rehash the password of user %s", user_id)
+        
+    @staticmethod
+    async def authenticate_token(token: str, admin: bool = False) -> tuple[TokenClaims, dict]:
+        """
+        Validate an access token without touching the database on a cache hit:
+        the signature and claims are trusted for the role, the token version is checked against the cached user.
+        
+        Returns the claims and the user from get_auth_user.
+        401 for a bad, expired or revoked token, 403 when admin is required and the token is not an admin's.
+        """
+        unauthorized = HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+        try:
+            claims = TokenClaims.model_validate(jwt_decode(token))
+        except Exception:
+            raise unauthorized
+        user = await get_auth_user(claims.id)
+        if user is None or user["token_version"] != claims.ver:
+            raise unauthorized
+        if admin and claims.role != ADMIN_ROLE:
+            raise HTTPException(status_code=403, detail="User is not an admin")
+        return claims, user
         
     async def get_current_user(self, token: str) -> UserResponse:
         try:
-            payload = jwt_decode(token)
-            user_id: int = payload.get("id")
-            if not user_id:
-                raise HTTPException(status_code=400, detail="Missing user_id in token payload")
-            user = await self.user_service.get_user_by_id(user_id)
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            return user
+            claims, user = await self.authenticate_token(token)
+            return UserResponse.model_validate(user)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
     async def get_current_admin(self, token: str) -> UserResponse:
         try:
-            payload = jwt_decode(token)
-
-            user_id: int = payload.get("id")
-            if not user_id:
-                raise HTTPException(status_code=400, detail="Missing user_id in token payload")
-            user = await self.user_service.get_user_by_id(user_id)
-
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            if (await self.role_service.get_role_by_id(user.role_id)).role != "админ":
-                raise HTTPException(status_code=403, detail="User is not an admin")
-            return user
+            claims, user = await self.authenticate_token(token, admin=True)
+            return UserResponse.model_validate(user)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     
@@ -148,13 +209,15 @@ class AuthenticationService:
             user = await self.user_service.get_user_by_id(reset_token.user_id)
             
             # Хешируем новый пароль
-            hashed_password = pwd_context.hash(request.new_password)
+            hashed_password = await password_hasher.hash(request.new_password)
             
             # Обновляем пароль
             await self.user_service.update_password(user.id, hashed_password)
             
             # Удаляем использованный токен
             await reset_repo.delete_token(request.token)
+            # the new token version is committed now, drop what may have been cached in between
+            await invalidate_auth_user(user.id)
             
             return {"message": "Ваш пароль успешно обновлен"}
         except Exception as e:
@@ -169,23 +232,74 @@ class AuthenticationService:
         """
         pass
     
-    async def refresh_token(self, token: str):
+    async def refresh_token(self, token: str) -> TokenResponse:
         """
-        refresh the token
-        will be soon released!!!
+        exchange a refresh token for a new access token and a new refresh token of the same family,
+        no password check and the user comes from the auth cache
+        a token that was already used revokes its family, e.g. when it was stolen and used by someone else
         
         Args:
-            token (str)
+            token (str): refresh token
         """
-        pass 
+        token_hash = hash_refresh_token(token)
+        try:
+            tokens = None
+            async with self.session.begin():
+                refresh_token = await self.refresh_token_repo.use_refresh_token(token_hash)
+                if refresh_token is None:
+                    used_token = await self.refresh_token_repo.get_refresh_token(token_hash)
+                    if used_token is not None:
+                        logger.warning(
+                            "Refresh token reused, revoking family %s of user %s",
+                            used_token.family_id,
+                            used_token.user_id
+                        )
+                        await self.refresh_token_repo.delete_family(used_token.family_id)
+                else:
+                    user = await get_auth_user(refresh_token.user_id)
+                    if (
+                        refresh_token.expires_at < datetime.utcnow()
+                        or user is None
+                        or user["token_version"] != refresh_token.token_version
+                    ):
+                        await self.refresh_token_repo.delete_family(refresh_token.family_id)
+                    else:
+                        tokens = await self._issue_tokens(
+                            user["id"],
+                            user["role"],
+                            user["token_version"],
+                            family_id=refresh_token.family_id
+                        )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if tokens is None:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        return tokens
     
-    async def logout(self, token: str):
+    async def logout(self, token: str) -> dict:
         """
-        log out from the system
+        log out from the system, revokes the family of the refresh token
+        the access token stays valid until it expires
         
         Args:
-            token (str)
+            token (str): refresh token
         """
-        pass
-            
-    
\ No newline at end of file
+        try:
+            async with self.session.begin():
+                refresh_token = await self.refresh_token_repo.get_refresh_token(hash_refresh_token(token))
+                if refresh_token is not None:
+                    await self.refresh_token_repo.delete_family(refresh_token.family_id)
+            return {"message": "Logged out"}
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+async def sweep_refresh_tokens() -> None:
+    async with async_session() as session:
+        async with session.begin():
+            deleted = await RefreshTokenRepository(session).delete_expired(datetime.utcnow())
+    if deleted:
+        logger.info("Deleted %d expired refresh tokens", deleted)
+
+
+refresh_token_sweeper = PeriodicTask(sweep_refresh_tokens, interval=refresh_token_sweep_interval)
@@ -0,0 +1,143 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, writes are then only serialized within the process
+    fcntl = None
+
+from app.config import app_config_file
+
+logger = logging.getLogger(__name__)
+
+# how often other workers' writes are picked up
+CONFIG_POLL_INTERVAL = 2  # seconds
+
+DEFAULT_CONFIG = {
+    "app_name": "HRM System",
+    "version": "1.0",
+    "telegram_chat_ids": []
+}
+
+
+class ConfigStore:
+    """
+    The JSON app config kept parsed in memory.
+
+    Reads never touch the file. Writes are read-modify-write under a thread lock and an flock on a side file,
+    so concurrent edits from any worker are serialized, and land atomically through a temp file and rename.
+    A background task polls the file's mtime to pick up writes made by other workers.
+    """
+    def __init__(self, path: str | Path, default: dict = DEFAULT_CONFIG):
+        self.path = Path(path)
+        self.default = default
+        self._data: dict | None = None
+        self._stamp: tuple[int, int] | None = None
+        self._chat_ids: list[str] = []
+        self._lock = threading.Lock()
+        self._poller: asyncio.Task | None = None
+
+    def get(self) -> dict:
+        """
+        Current config, treat it as read only and change it through update()
+        """
+        if self._data is None:
+            with self._lock:
+                self._reload()
+        return self._data
+
+    def telegram_chat_ids(self) -> list[str]:
+        self.get()
+        return self._chat_ids
+
+    async def update(self, change: Callable[[dict], Any]) -> Any:
+        """
+        Apply change to a copy of the latest config and save it, returns what change returns.
+        Exceptions raised by change abort the write.
+        """
+        return await asyncio.to_thread(self._update, change)
+
+    def start(self) -> None:
+        self.get()
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+
+    def _update(self, change: Callable[[dict], Any]) -> Any:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path.with_name(self.path.name + ".lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # another worker may have written since the last poll
+            self._reload()
+            data = copy.deepcopy(self._data)
+            result = change(data)
+            self._write(data)
+            self._set(data, self._file_stamp())
+            return result
+
+    def _write(self, data: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _reload(self) -> None:
+        stamp = self._file_stamp()
+        if stamp is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = copy.deepcopy(self.default)
+            self._write(data)
+            self._set(data, self._file_stamp())
+        elif stamp != self._stamp:
+            with open(self.path, "r") as f:
+                self._set(json.load(f), stamp)
+
+    def _set(self, data: dict, stamp: tuple[int, int] | None) -> None:
+        self._chat_ids = [chat["chat_id"] for chat in data.get("telegram_chat_ids", [])]
+        self._data = data
+        self._stamp = stamp
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(CONFIG_POLL_INTERVAL)
+            try:
+                if self._file_stamp() != self._stamp:
+                    await asyncio.to_thread(self._locked_reload)
+            except Exception:
+                logger.exception("Failed to reload %s", self.path)
+
+    def _locked_reload(self) -> None:
+        with self._lock:
+            self._reload()
+
+
+config_store = ConfigStore(app_config_file)
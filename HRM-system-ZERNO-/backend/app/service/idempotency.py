@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+
+from app.config import idempotency_cache_url, idempotency_ttl, idempotency_max_keys
+from app.service.utils.cache import create_cache_backend
+
+# results of requests sent with an Idempotency-Key, memory:// only deduplicates retries that hit the same worker
+idempotency_cache = create_cache_backend(idempotency_cache_url, namespace="idempotency", maxsize=idempotency_max_keys)
+
+IDEMPOTENCY_PENDING = "pending"
+IDEMPOTENCY_DONE = "done"
+# a claim outlives a request stuck this long, so the key cannot be blocked forever
+IDEMPOTENCY_PENDING_TTL = 60  # seconds
+# how long a concurrent retry waits for the first request before answering 409
+IDEMPOTENCY_WAIT = 5  # seconds
+IDEMPOTENCY_POLL_INTERVAL = 0.05  # seconds
+
+
+def request_fingerprint(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+async def run_idempotent(
+    key: str | None,
+    fingerprint: str,
+    handler: Callable[[], Awaitable[tuple[int, Any]]]
+) -> tuple[int, Any, bool]:
+    """
+    Run handler at most once per key and return (status_code, content, replayed).
+
+    The first request claims the key and stores handler's (status_code, content) for idempotency_ttl seconds,
+    later requests with the key get that result back. A retry arriving while the first request is still running
+    waits for it, a key reused with a different body is rejected with 422.
+    If handler raises the claim is dropped so that the client can retry. Without a key handler just runs.
+    """
+    if key is None:
+        status_code, content = await handler()
+        return status_code, content, False
+
+    cache_key = hashlib.sha256(key.encode()).hexdigest()
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT
+    while not await idempotency_cache.add(
+        cache_key,
+        {"state": IDEMPOTENCY_PENDING, "fingerprint": fingerprint},
+        ttl=IDEMPOTENCY_PENDING_TTL
+    ):
+        entry = await idempotency_cache.get(cache_key)
+        if entry is not None:
+            if entry["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            if entry["state"] == IDEMPOTENCY_DONE:
+                return entry["status_code"], entry["content"], True
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"}
+            )
+        await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+    try:
+        status_code, content = await handler()
+    except BaseException:
+        await idempotency_cache.delete(cache_key)
+        raise
+    await idempotency_cache.set(
+        cache_key,
+        {
+            "state": IDEMPOTENCY_DONE,
+            "fingerprint": fingerprint,
+            "status_code": status_code,
+            "content": content
+        },
+        ttl=idempotency_ttl
+    )
+    return status_code, content, False
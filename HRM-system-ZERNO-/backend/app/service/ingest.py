@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# a batch failing for another reason than an outage is retried with exponential backoff this many times,
+# then split in halves that get one attempt each; an item still failing on its own is dropped and logged
+INGEST_MAX_RETRIES = 5
+INGEST_RETRY_DELAY = 1  # seconds, doubled after every failed attempt
+# during an outage the batch is retried until the database is back, at least this often
+INGEST_MAX_BACKOFF = 60  # seconds
+
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError, ConnectionError, OSError, asyncio.TimeoutError)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether error, or an error it was raised from (services wrap them in HTTPException), is the database
+    or the connection to it failing rather than the data
+    """
+    while error is not None:
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        if isinstance(error, DBAPIError) and error.connection_invalidated:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class IngestQueue:
+    """
+    Bounded in-process write-behind queue.
+
+    submit() only enqueues, a single worker hands the items to handler in batches of up to batch_size,
+    flushing earlier once the oldest item has waited max_delay seconds.
+    A batch failing because of an outage is retried as a whole until it is written, nothing accepted is dropped.
+    Other failures are retried a few times, then the batch is bisected so only the items failing alone are dropped.
+    When the queue is full or stopped submit() raises IngestQueueFull so the caller can push back.
+    """
+    def __init__(
+        self,
+        handler: Callable[[list[Any]], Awaitable[None]],
+        maxsize: int = 10000,
+        batch_size: int = 100,
+        max_delay: float = 0.2
+    ):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._worker: asyncio.Task | None = None
+        self._closed = False
+
+    def submit(self, item: Any) -> None:
+        if self._closed:
+            raise IngestQueueFull("Ingest queue is shutting down")
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            raise IngestQueueFull("Ingest queue is full")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._closed = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Stop accepting items and wait up to timeout seconds for the queued ones to be written.
+        """
+        self._closed = True
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Ingest queue not drained on shutdown, %d items lost", self._queue.qsize())
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list[Any], retries: int = INGEST_MAX_RETRIES) -> None:
+        delay = INGEST_RETRY_DELAY
+        attempt = 0
+        while True:
+            try:
+                await self.handler(batch)
+                return
+            except Exception as e:
+                if is_transient(e):
+                    logger.warning("Ingest batch of %d failed, retrying in %ss: %s", len(batch), delay, e)
+                else:
+                    attempt += 1
+                    logger.exception("Ingest batch of %d failed, attempt %d", len(batch), attempt)
+                    if attempt >= retries:
+                        break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, INGEST_MAX_BACKOFF)
+
+        if len(batch) == 1:
+            logger.error("Dropping ingest item: %r", batch[0])
+            return
+        # last resort, a bad item must not take the rest of the batch down with it
+        middle = len(batch) // 2
+        await self._flush(batch[:middle], retries=1)
+        await self._flush(batch[middle:], retries=1)
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import smtplib
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+
+from app.config import (
+    email_host,
+    email_port,
+    email_user,
+    email_password,
+    email_use_tls,
+    email_queue_size
+)
+from app.service.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# a message that keeps failing with temporary errors is retried with exponential backoff, then dropped and logged
+MAIL_MAX_ATTEMPTS = 5
+MAIL_RETRY_DELAY = 2  # seconds, doubled after every failed attempt
+# servers drop idle sessions anyway, close ours first once nothing was sent for this long
+MAIL_IDLE_TIMEOUT = 60  # seconds
+SMTP_TIMEOUT = 30  # seconds
+
+smtp_send_seconds = Histogram(
+    "smtp_send_seconds",
+    "Duration of sending one email over SMTP by outcome",
+    labelnames=("outcome",)
+)
+smtp_connects_total = Counter("smtp_connects_total", "SMTP sessions opened, including reconnects")
+
+
+class MailQueueFull(Exception):
+    pass
+
+
+class Mailer:
+    """
+    Background email delivery over one persistent, authenticated SMTP session.
+
+    send() only enqueues, a single worker drains the queue and hands every message to a dedicated thread
+    that owns the smtplib connection, so the event loop never waits on the network.
+    A dropped session is reopened once per message, temporary failures are retried with exponential backoff,
+    permanent (5xx) rejections are logged and dropped.
+    """
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str | None,
+        password: str | None,
+        use_tls: bool = True,
+        maxsize: int = 1000
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # one thread, smtplib connections must not be shared between threads
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._smtp: smtplib.SMTP | None = None
+        self._worker: asyncio.Task | None = None
+        self._closed = False
+
+    def send(self, message: Message) -> None:
+        """
+        Queue message, From and To are taken from its headers
+        """
+        if self._closed:
+            raise MailQueueFull("Mail queue is shutting down")
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            raise MailQueueFull("Mail queue is full")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._closed = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Stop accepting messages, wait up to timeout seconds for the queued ones and close the session.
+        """
+        self._closed = True
+        if self._worker is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.error("Mail queue not drained on shutdown, %d messages lost", self._queue.qsize())
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self._in_thread(self._disconnect)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                message = await asyncio.wait_for(self._queue.get(), MAIL_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await self._in_thread(self._disconnect)
+                continue
+            try:
+                await self._deliver(message)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, message: Message) -> None:
+        delay = MAIL_RETRY_DELAY
+        for attempt in range(1, MAIL_MAX_ATTEMPTS + 1):
+            start = time.perf_counter()
+            try:
+                await self._in_thread(self._send_message, message)
+                smtp_send_seconds.labels(outcome="sent").observe(time.perf_counter() - start)
+                return
+            except Exception as e:
+                permanent = isinstance(e, smtplib.SMTPRecipientsRefused) or (
+                    isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                )
+                give_up = permanent or attempt == MAIL_MAX_ATTEMPTS
+                smtp_send_seconds.labels(outcome="failed" if give_up else "retry").observe(time.perf_counter() - start)
+                if give_up:
+                    logger.error("Dropping email to %s after %d attempts: %s", message["To"], attempt, e)
+                    return
+                logger.warning("Sending email to %s failed, attempt %d: %s", message["To"], attempt, e)
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _in_thread(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    # everything below runs on the smtp thread
+
+    def _send_message(self, message: Message) -> None:
+        if self._smtp is None:
+            self._connect()
+            self._smtp.send_message(message)
+            return
+        try:
+            self._smtp.send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # the server closed the idle session, one fresh session before counting it as a failed attempt
+            self._disconnect()
+            self._connect()
+            self._smtp.send_message(message)
+
+    def _connect(self) -> None:
+        if self.port == 465:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=SMTP_TIMEOUT, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.use_tls and self.port != 465:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        smtp_connects_total.inc()
+        self._smtp = smtp
+
+    def _disconnect(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+
+mailer = Mailer(
+    host=email_host,
+    port=email_port,
+    user=email_user,
+    password=email_password,
+    use_tls=email_use_tls,
+    maxsize=email_queue_size
+)
+
+Gauge("email_queue_depth", "Emails waiting to be sent", function=mailer.qsize)
@@ -2,6 +2,7 @@ from fastapi.exceptions import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.repository.public.category import CategoryRepository
 from app.schema.emps.category import CategoryResponse
+from app.service.reference_data import reference_data
 
 
 class CategoryService:
@@ -15,22 +16,19 @@ class CategoryService:
   
     async def get_category_by_id(self, category_id) -> CategoryResponse:
         try:
-            category = await self.category_repo.get_category_by_id(category_id)
-            return category
+            return await reference_data.lookup("categories", category_id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
     async def get_id_by_category(self, category) -> int | None:
         try:
-            category_id = await self.category_repo.get_id_by_category(category)
-            return category_id
+            return await reference_data.lookup("category_ids", category)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
     async def get_all_categories(self) -> list[CategoryResponse]:
         try:
-            categories = await self.category_repo.get_all_categories()
-            return categories
+            return list((await reference_data.get()).categories.values())
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
@@ -38,6 +36,7 @@ class CategoryService:
         try:
             async with self.session.begin():
                 category = await self.category_repo.create_category(category_create)
+            reference_data.invalidate()
             return category
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -50,6 +49,7 @@ class CategoryService:
                 if not category:
                     raise HTTPException(status_code=404, detail="Category not found")
                 updated_category = await self.category_repo.update_category(category, category_update)
+            reference_data.invalidate()
             return updated_category
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -62,6 +62,7 @@ class CategoryService:
                 if not category:
                     raise HTTPException(status_code=404, detail="Category not found")
                 await self.category_repo.delete_category(category)
+            reference_data.invalidate()
             return {"detail": "Category deleted"}
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
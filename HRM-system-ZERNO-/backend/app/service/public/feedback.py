@@ -1,48 +1,125 @@
+import csv
 import datetime
+import io
+import json
+from typing import AsyncIterator
 from fastapi.exceptions import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError, IntegrityError
 from app.model import Feedback, WaiterScore, Contact, Rating
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repository.public.feedbacks import FeedbackRepository
+from app.repository.public.waiter_score_daily import WaiterScoreDailyRepository
+from app.repository.public.user import UserRepository
+from app.repository.public.telegram_outbox import TelegramOutboxRepository
+from app.service.stats_cache import invalidate_waiters
+from app.service.telegram_dispatcher import telegram_dispatcher
+from app.service.reference_data import reference_data
+from app.service.utils.cursor import encode_cursor, decode_cursor
 
-from app.schema.emps.feedbacks import CompleteFeedbackCreate, FeedbackUpdate
+from app.schema.emps.feedbacks import CompleteFeedbackCreate, BulkFeedbackCreate, FeedbackUpdate, FeedbackResponse
+
+EXPORT_BATCH_SIZE = 500
+FEEDBACKS_PAGE_SIZE = 50
+FEEDBACKS_PAGE_MAX = 200
+BULK_CREATE_MAX = 1000
 
 
 class FeedbackService:
     def __init__(
         self,
         session: AsyncSession,
-        feedback_repo: FeedbackRepository
+        feedback_repo: FeedbackRepository,
+        waiter_score_daily_repo: WaiterScoreDailyRepository,
+        user_repo: UserRepository,
+        telegram_outbox_repo: TelegramOutboxRepository
     ):
         self.session = session
         self.feedback_repo = feedback_repo
+        self.waiter_score_daily_repo = waiter_score_daily_repo
+        self.user_repo = user_repo
+        self.telegram_outbox_repo = telegram_outbox_repo
 
     async def get_waiter_feedback_comments_by_date(
         self,
-        cursor: int = 0,
+        cursor: str = None,
         limit: int = 5,
         waiter_id: int = None,
         start_date: datetime.datetime = None,
         end_date: datetime.datetime = None,
-        ascending: bool = False
+        ascending: bool = False,
+        with_comment: bool = False
     ) -> dict:
+        """
+        Returns {"feedbacks": [{"id", "comment"}, ...], "cursor": token of the next page or None when exhausted}
+        """
+        try:
+            # "" and the old numeric "0" both mean the first page
+            after = decode_cursor(cursor) if cursor and cursor != "0" else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         try:
-            response = await self.feedback_repo.get_waiter_feedback_comments_by_date_pagination(
-                cursor=cursor,
+            rows = await self.feedback_repo.get_waiter_feedback_comments_by_date_pagination(
+                after=after,
                 limit=limit,
                 waiter_id=waiter_id,
                 start_date=start_date,
                 end_date=end_date,
-                ascending=ascending
+                ascending=ascending,
+                with_comment=with_comment
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        feedbacks = [{"id": row["id"], "comment": row["comment"]} for row in rows]
+        # Use the keyset of the last row as the new cursor for pagination
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if rows else None
+        return {"feedbacks": feedbacks, "cursor": next_cursor}
+        
+    async def get_feedback_series(
+        self,
+        granularity: str,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        waiter_id: int = None,
+        feedback_type_id: int = None
+    ) -> list[dict]:
+        try:
+            return await self.feedback_repo.get_feedback_series(
+                granularity=granularity,
+                start_date=start_date,
+                end_date=end_date,
+                waiter_id=waiter_id,
+                feedback_type_id=feedback_type_id
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    async def get_ratings_heatmap(
+        self,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        feedback_type_id: int = None
+    ) -> list[tuple[int, int, int, float]]:
+        try:
+            return await self.feedback_repo.get_ratings_heatmap(
+                start_date=start_date,
+                end_date=end_date,
+                feedback_type_id=feedback_type_id
             )
-            return response
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
     async def create_feedback(
         self,
-        feedback_create: CompleteFeedbackCreate
+        feedback_create: CompleteFeedbackCreate,
+        notify_chat_ids: list[str] = ()
     ) -> Feedback:
+        """
+        notify_chat_ids get a Telegram notification through the outbox, written in the same statement
+        """
         try:
             feedback = Feedback(
                 is_notified=feedback_create.is_notified,
@@ -70,27 +147,275 @@ class FeedbackService:
                 for rating in feedback_create.ratings
             ]
             
-            async with self.session.begin() as transaction:
-                self.session.add(feedback)
-                # create feedback
-                # repo comment create comment  by id
-                # repo contact create contact by id
-                # repo rating create rating by id
+            hold_until = await telegram_dispatcher.hold_until(feedback)
+            
+            # one INSERT ... RETURNING statement for the feedback, its children, the rollup and the outbox,
+            # the returned ids are set on the objects so no refresh is needed
+            async with self.session.begin():
+                await self.feedback_repo.create_complete_feedback(
+                    feedback,
+                    also=[
+                        self.waiter_score_daily_repo.apply_scores_statement(
+                            [(feedback.created_at.date(), feedback.waiter_score)] if feedback.waiter_score else []
+                        ),
+                        lambda feedback_id: self.telegram_outbox_repo.enqueue_statement(
+                            feedback_id,
+                            list(notify_chat_ids),
+                            hold_until=hold_until
+                        )
+                    ]
+                )
             
-            await self.session.refresh(feedback, ["contact", "ratings", "waiter_score"])
+            if notify_chat_ids:
+                telegram_dispatcher.wake()
+            if feedback.waiter_score:
+                await invalidate_waiters([feedback.waiter_score.waiter_id])
             return feedback
 
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-    async def get_all_feedbacks(self) -> list[Feedback]:
+    async def bulk_create_feedbacks(
+        self,
+        items: list[dict],
+        notify_chat_ids: list[str] = ()
+    ) -> tuple[list[dict], list[Feedback]]:
+        """
+        Validate every item on its own and insert the valid ones in a single transaction,
+        together with their Telegram outbox rows for notify_chat_ids.
+        When the database rejects the batch, the items are inserted again one savepoint each,
+        so only the offending ones are reported.
+        Returns one result per item, {"index", "id"} or {"index", "error"}, and the created feedbacks.
+        """
+        if len(items) > BULK_CREATE_MAX:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_CREATE_MAX} feedbacks per request")
+        
+        results: list[dict] = [None] * len(items)
+        valid: list[tuple[int, BulkFeedbackCreate]] = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, BulkFeedbackCreate.model_validate(item)))
+            except ValidationError as e:
+                results[index] = {"index": index, "error": json.loads(e.json(include_url=False))}
+        
+        # references are checked up front, a foreign key violation would abort the whole batch
+        refs = await reference_data.get()
+        try:
+            waiter_ids = await self.user_repo.get_existing_user_ids({
+                feedback_create.waiter_score.waiter_id
+                for _, feedback_create in valid if feedback_create.waiter_score
+            })
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        now = datetime.datetime.now()
+        feedbacks: list[tuple[int, Feedback]] = []
+        for index, feedback_create in valid:
+            error = self._check_references(feedback_create, refs, waiter_ids)
+            if error:
+                results[index] = {"index": index, "error": error}
+                continue
+            
+            feedback = Feedback(
+                is_notified=feedback_create.is_notified,
+                created_at=feedback_create.created_at or now
+            )
+            if feedback_create.waiter_score:
+                feedback.waiter_score = WaiterScore(**feedback_create.waiter_score.model_dump())
+            if feedback_create.contact:
+                feedback.contact = Contact(phone=feedback_create.contact)
+            feedback.ratings = [
+                Rating(rating=rating.rating, feedback_type_id=rating.feedback_type_id)
+                for rating in feedback_create.ratings
+            ]
+            feedbacks.append((index, feedback))
+        
+        hold = {index: await telegram_dispatcher.hold_until(feedback) for index, feedback in feedbacks}
+        try:
+            async with self.session.begin():
+                await self._insert_feedbacks(feedbacks, hold, notify_chat_ids)
+        except (IntegrityError, DataError):
+            feedbacks = await self._insert_feedbacks_one_by_one(feedbacks, hold, notify_chat_ids, results)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        created = [feedback for _, feedback in feedbacks]
+        if created and notify_chat_ids:
+            telegram_dispatcher.wake()
+        await invalidate_waiters({feedback.waiter_score.waiter_id for feedback in created if feedback.waiter_score})
+        for index, feedback in feedbacks:
+            results[index] = {"index": index, "id": feedback.id}
+        return results, created
+
+    async def _insert_feedbacks(
+        self,
+        feedbacks: list[tuple[int, Feedback]],
+        hold: dict[int, datetime.datetime | None],
+        notify_chat_ids: list[str]
+    ) -> None:
+        created = [feedback for _, feedback in feedbacks]
+        held = [hold[index] for index, _ in feedbacks]
+        await self.feedback_repo.bulk_create_feedbacks(created)
+        await self.waiter_score_daily_repo.apply_scores([
+            (feedback.created_at.date(), feedback.waiter_score)
+            for feedback in created if feedback.waiter_score
+        ])
+        await self.telegram_outbox_repo.enqueue(
+            [feedback.id for feedback in created],
+            list(notify_chat_ids),
+            held={feedback.id for feedback, hold_until in zip(created, held) if hold_until},
+            hold_until=max(filter(None, held), default=None)
+        )
+
+    async def _insert_feedbacks_one_by_one(
+        self,
+        feedbacks: list[tuple[int, Feedback]],
+        hold: dict[int, datetime.datetime | None],
+        notify_chat_ids: list[str],
+        results: list[dict]
+    ) -> list[tuple[int, Feedback]]:
+        """
+        Insert every feedback in its own savepoint of one transaction, the ones the database rejects
+        get their error in results. Returns the inserted feedbacks.
+        """
+        inserted = []
+        try:
+            async with self.session.begin():
+                for index, feedback in feedbacks:
+                    try:
+                        async with self.session.begin_nested():
+                            await self._insert_feedbacks([(index, feedback)], hold, notify_chat_ids)
+                    except (IntegrityError, DataError) as e:
+                        results[index] = {"index": index, "error": str(e.orig)}
+                        continue
+                    inserted.append((index, feedback))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return inserted
+
+    @staticmethod
+    def _check_references(feedback_create: CompleteFeedbackCreate, refs, waiter_ids: set[int]) -> str | None:
+        waiter_score = feedback_create.waiter_score
+        if waiter_score:
+            if waiter_score.waiter_id not in waiter_ids:
+                return f"Waiter {waiter_score.waiter_id} not found"
+            if waiter_score.category_id not in refs.categories:
+                return f"Category {waiter_score.category_id} not found"
+            if waiter_score.tag_id not in refs.tags:
+                return f"Tag {waiter_score.tag_id} not found"
+        for rating in feedback_create.ratings:
+            if rating.feedback_type_id not in refs.feedback_types:
+                return f"Feedback type {rating.feedback_type_id} not found"
+        return None
+
+    async def get_all_feedbacks(
+        self,
+        cursor: str = None,
+        limit: int = None,
+        waiter_id: int = None,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        has_contact: bool = None,
+        has_comment: bool = None
+    ) -> dict:
+        """
+        Returns {"feedbacks": [...], "cursor": token of the next page or None on the last page}
+        Without cursor and limit all feedbacks are returned at once, as the admin panel expects
+        """
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        paginate = cursor is not None or limit is not None
+        limit = min(limit or FEEDBACKS_PAGE_SIZE, FEEDBACKS_PAGE_MAX)
         try:
             async with self.session.begin():
-                feedbacks = await self.feedback_repo.get_all_feedbacks()
-                return feedbacks
+                # one extra row tells whether there is a next page
+                feedbacks = await self.feedback_repo.get_all_feedbacks(
+                    limit=limit + 1 if paginate else None,
+                    after=after,
+                    waiter_id=waiter_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    has_contact=has_contact,
+                    has_comment=has_comment
+                )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        next_cursor = None
+        if paginate and len(feedbacks) > limit:
+            feedbacks = feedbacks[:limit]
+            next_cursor = encode_cursor(feedbacks[-1].created_at, feedbacks[-1].id)
+        return {"feedbacks": feedbacks, "cursor": next_cursor}
+
+    async def export_feedbacks(
+        self,
+        format: str = "ndjson",
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the export one batch at a time, for a StreamingResponse.
+        ndjson has one FeedbackResponse per line, csv one row per feedback with a column per feedback type.
+        """
+        refs = await reference_data.get()
+        feedback_types = list(refs.feedback_types.values())
         
+        async with self.session.begin():
+            if format == "csv":
+                # BOM so that Excel opens the file as UTF-8
+                yield "\ufeff" + self._csv_lines([[
+                    "id", "created_at", "is_notified", "contact",
+                    "waiter_id", "score", "category", "tag", "comment",
+                    *(feedback_type.feedback_type for feedback_type in feedback_types)
+                ]])
+            
+            async for feedbacks in self.feedback_repo.stream_feedbacks(
+                start_date=start_date,
+                end_date=end_date,
+                batch_size=EXPORT_BATCH_SIZE
+            ):
+                if format == "ndjson":
+                    yield "".join(
+                        FeedbackResponse.model_validate(feedback).model_dump_json() + "\n"
+                        for feedback in feedbacks
+                    )
+                    continue
+                
+                rows = []
+                for feedback in feedbacks:
+                    score = feedback.waiter_score
+                    category = refs.categories.get(score.category_id) if score else None
+                    tag = refs.tags.get(score.tag_id) if score else None
+                    ratings = {rating.feedback_type_id: rating.rating for rating in feedback.ratings}
+                    rows.append([
+                        feedback.id,
+                        feedback.created_at.isoformat(sep=" ") if feedback.created_at else "",
+                        feedback.is_notified,
+                        feedback.contact.phone if feedback.contact else "",
+                        score.waiter_id if score else "",
+                        score.score if score else "",
+                        category.category if category else "",
+                        tag.tag if tag else "",
+                        (score.comment or "") if score else "",
+                        *(ratings.get(feedback_type.id, "") for feedback_type in feedback_types)
+                    ])
+                yield self._csv_lines(rows)
+
+    @staticmethod
+    def _csv_lines(rows: list[list]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    async def get_notification_stats(self) -> dict:
+        try:
+            outbox = await self.telegram_outbox_repo.count_by_status()
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
+        return {"outbox": outbox, **telegram_dispatcher.metrics}
 
     async def update_feedback(
         self,
@@ -118,7 +443,15 @@ class FeedbackService:
                 feedback = await self.feedback_repo.get_feedback_by_id(feedback_id)
                 if not feedback:
                     raise HTTPException(status_code=404, detail="Feedback not found")
+                if feedback.waiter_score:
+                    await self.waiter_score_daily_repo.apply_scores(
+                        [(feedback.created_at.date(), feedback.waiter_score)],
+                        sign=-1
+                    )
                 response = await self.feedback_repo.delete_feedback(feedback=feedback)
+            
+            if feedback.waiter_score:
+                await invalidate_waiters([feedback.waiter_score.waiter_id])
             return response
         
         except Exception as e:
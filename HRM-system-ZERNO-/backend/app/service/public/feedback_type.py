@@ -1,5 +1,6 @@
 from fastapi import HTTPException
 from app.repository.public.feedback_type import FeedbackTypeRepository
+from app.service.reference_data import reference_data
 from sqlalchemy.ext.asyncio import AsyncSession
 
 class FeedbackTypeService:
@@ -13,8 +14,7 @@ class FeedbackTypeService:
         
     async def get_feedback_type_by_id(self, feedback_type_id):
         try:
-            feedback_type = await self.feedback_type_repo.get_feedback_type_by_id(feedback_type_id)
-            return feedback_type
+            return await reference_data.lookup("feedback_types", feedback_type_id)
         
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -22,8 +22,7 @@ class FeedbackTypeService:
     
     async def get_all_feedback_types(self):
         try:
-            feedback_types = await self.feedback_type_repo.get_all_feedback_types()
-            return feedback_types
+            return list((await reference_data.get()).feedback_types.values())
         
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -32,6 +31,7 @@ class FeedbackTypeService:
         try:
             async with self.session.begin():
                 feedback_type = await self.feedback_type_repo.create_feedback_type(feedback_type_create)
+            reference_data.invalidate()
             return feedback_type
         
         except Exception as e:
@@ -45,6 +45,7 @@ class FeedbackTypeService:
                     raise HTTPException(status_code=404, detail="Feedback type not found")
                 
                 updated_feedback_type = await self.feedback_type_repo.update_feedback_type(feedback_type, feedback_type_update)
+            reference_data.invalidate()
             return updated_feedback_type
         
         except Exception as e:
@@ -58,6 +59,7 @@ class FeedbackTypeService:
                     raise HTTPException(status_code=404, detail="Feedback type not found")
                 
                 await self.feedback_type_repo.delete_feedback_type(feedback_type)
+            reference_data.invalidate()
             return {"detail": "Feedback type deleted"}
         
         except Exception as e:
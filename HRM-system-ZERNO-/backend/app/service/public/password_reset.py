@@ -1,12 +1,18 @@
-import smtplib
+import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from app.config import email_host, email_port, email_user, email_password, app_url
+from app.config import email_user, app_url
+from app.service.mailer import mailer, MailQueueFull
+
+logger = logging.getLogger(__name__)
 
 
 class EmailService:
     @staticmethod
     async def send_email(to_email: str, subject: str, html_content: str):
+        """
+        Queue the email for the background mailer, returns False when the queue is full
+        """
         message = MIMEMultipart()
         message['From'] = email_user
         message['To'] = to_email
@@ -15,15 +21,10 @@ class EmailService:
         message.attach(MIMEText(html_content, 'html'))
         
         try:
-            server = smtplib.SMTP(email_host, email_port)
-            server.starttls()
-            server.login(email_user, email_password)
-            text = message.as_string()
-            server.sendmail(email_user, to_email, text)
-            server.quit()
+            mailer.send(message)
             return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
+        except MailQueueFull as e:
+            logger.error("Error sending email: %s", e)
             return False
 
     @staticmethod
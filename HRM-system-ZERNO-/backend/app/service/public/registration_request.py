@@ -5,12 +5,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schema.users.user import UserCreate
 from app.schema.users.registration_request import RegistrationRequestCreate, RegistrationRequestResponse, RegistrationRequestUpdate
-from passlib.context import CryptContext
+from app.service.utils.password import password_hasher
 
 from .user import UserService
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class RegistrationRequest:
     def __init__(
@@ -47,7 +45,7 @@ class RegistrationRequest:
         create a registration request
         """
         try:
-            hashed_password = pwd_context.hash(registration_request_create.hashed_password)
+            hashed_password = await password_hasher.hash(registration_request_create.hashed_password)
             registration_request_create.hashed_password = hashed_password
             
             async with self.session.begin():
@@ -1,4 +1,5 @@
 from app.repository.public.role import RoleRepositroy
+from app.service.reference_data import reference_data
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,8 +21,7 @@ class RoleService:
         get all roles
         """
         try:
-            roles = await self.role_repo.get_all_roles()
-            return roles
+            return list((await reference_data.get()).roles.values())
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     
@@ -30,8 +30,10 @@ class RoleService:
         get a role id by name
         """
         try:
-            role = await self.role_repo.get_role_id_by_name(role_name)
-            return role
+            role_id = await reference_data.lookup("role_ids", role_name)
+            if role_id is None:
+                raise HTTPException(status_code=404, detail="Role not found")
+            return role_id
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
@@ -40,7 +42,6 @@ class RoleService:
         get a role by id
         """
         try:
-            role = await self.role_repo.get_role_by_id(role_id)
-            return role
+            return await reference_data.lookup("roles", role_id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -1,4 +1,5 @@
 from app.repository.public.tag import TagRepository
+from app.service.reference_data import reference_data
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,8 +16,7 @@ class TagService:
         
     async def get_tag_by_id(self, tag_id):
         try:
-            tag = await self.tag_repo.get_tag_by_id(tag_id)
-            return tag
+            return await reference_data.lookup("tags", tag_id)
         
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -24,16 +24,15 @@ class TagService:
         
     async def get_all_tags(self):
         try:
-            tags = await self.tag_repo.get_all_tags()
-            return tags
+            return list((await reference_data.get()).tags.values())
         
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         
     async def get_tags_by_category_id(self, category_id):
         try:
-            tags = await self.tag_repo.get_tags_by_category_id(category_id)
-            return tags
+            tags = (await reference_data.get()).tags.values()
+            return [tag for tag in tags if tag.category_id == category_id]
         
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -42,6 +41,7 @@ class TagService:
         try:
             async with self.session.begin():
                 tag = await self.tag_repo.create_tag(tag_create)
+            reference_data.invalidate()
             return tag
         
         except Exception as e:
@@ -55,6 +55,7 @@ class TagService:
                     raise HTTPException(status_code=404, detail="Tag not found")
                 
                 updated_tag = await self.tag_repo.update_tag(tag, tag_update)
+            reference_data.invalidate()
             return updated_tag
         
         except Exception as e:
@@ -68,6 +69,7 @@ class TagService:
                     raise HTTPException(status_code=404, detail="Tag not found")
                 
                 await self.tag_repo.delete_tag(tag)
+            reference_data.invalidate()
             return {"detail": "Tag deleted"}
         
         except Exception as e:
@@ -1,11 +1,10 @@
 from fastapi import HTTPException
 from app.model import User
 from app.schema.users.user import UserCreate, UserUpdate, UserResponse
-from passlib.context import CryptContext
 from app.repository.public.user import UserRepository
+from app.service.utils.password import password_hasher
+from app.service.auth_cache import invalidate_auth_user
 from sqlalchemy.ext.asyncio import AsyncSession
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
  
  
 class UserService:
@@ -32,7 +31,7 @@ class UserService:
         """
         try:
             if hash:
-                hashed_password = pwd_context.hash(user_create.hashed_password)
+                hashed_password = await password_hasher.hash(user_create.hashed_password)
                 user_create.hashed_password = hashed_password
             
             if nested:
@@ -122,8 +121,15 @@ class UserService:
                 user = await self.user_repo.get_user_by_id(user_id)
                 if not user:
                     raise HTTPException(status_code=404, detail="User not found")
+                # tokens carry the role, a new role or deactivation revokes them
+                if any(
+                    field in user_update.model_fields_set and getattr(user_update, field) != getattr(user, field)
+                    for field in ("role_id", "active")
+                ):
+                    user.token_version += 1
                 user = await self.user_repo.update_user(user, user_update)
-                return user
+            await invalidate_auth_user(user_id)
+            return user
         
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -139,7 +145,8 @@ class UserService:
             async with self.session.begin():
                 user = await self.user_repo.get_user_by_id(user_id)
                 await self.user_repo.delete_user(user)
-                return {"detail": "User deleted"}
+            await invalidate_auth_user(user_id)
+            return {"detail": "User deleted"}
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e)) 
 
@@ -157,7 +164,10 @@ class UserService:
                 raise HTTPException(status_code=404, detail="User not found")
 
             user.hashed_password = hashed_password
+            # sign out everywhere, tokens issued with the old password stop working
+            user.token_version += 1
             await self.user_repo.update_user(user, UserUpdate())
+            await invalidate_auth_user(user_id)
             return {"message": "Password updated successfully"}
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,52 @@
+import datetime
+from fastapi.exceptions import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository.public.waiter_score_daily import WaiterScoreDailyRepository
+
+
+class WaiterScoreDailyService:
+    def __init__(
+        self,
+        session: AsyncSession,
+        waiter_score_daily_repo: WaiterScoreDailyRepository
+    ):
+        self.session = session
+        self.waiter_score_daily_repo = waiter_score_daily_repo
+        
+    async def count_records_by_category(self, waiter_id: int) -> dict:
+        try:
+            return await self.waiter_score_daily_repo.get_count_records_by_category(waiter_id)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    async def count_records_by_tags(self, waiter_id: int) -> list[tuple[str, str, int]]:
+        try:
+            return await self.waiter_score_daily_repo.get_count_records_by_tags(waiter_id)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    async def get_leaderboard(
+        self,
+        start_day: datetime.date,
+        end_day: datetime.date,
+        metric: str = "csat",
+        top_k: int = 10,
+        min_feedbacks: int = 1
+    ) -> list[dict]:
+        try:
+            return await self.waiter_score_daily_repo.get_leaderboard(
+                start_day=start_day,
+                end_day=end_day,
+                metric=metric,
+                top_k=top_k,
+                min_feedbacks=min_feedbacks
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    async def rebuild(self) -> None:
+        """
+        Backfill the daily rollup from existing waiter_scores
+        """
+        async with self.session.begin():
+            await self.waiter_score_daily_repo.rebuild()
@@ -25,5 +25,17 @@ class WaiterScoreService:
     ) -> int:
         try:
             return await self.waiter_score_repo.get_count_records_by_tag_id(waiter_id, tag_id)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    async def count_records_by_category(self, waiter_id: int) -> dict:
+        try:
+            return await self.waiter_score_repo.get_count_records_by_category(waiter_id)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    async def count_records_by_tags(self, waiter_id: int) -> list[tuple[str, str, int]]:
+        try:
+            return await self.waiter_score_repo.get_count_records_by_tags(waiter_id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
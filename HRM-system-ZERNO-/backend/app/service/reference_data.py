@@ -0,0 +1,132 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from app.db.db import async_session
+from app.repository.public.category import CategoryRepository
+from app.repository.public.tag import TagRepository
+from app.repository.public.feedback_type import FeedbackTypeRepository
+from app.repository.public.role import RoleRepositroy
+
+# other workers only see create/update/delete through this reload interval
+REFERENCE_DATA_TTL = 300  # seconds
+# a lookup miss triggers a reload at most this often, so unknown ids can't hammer the database
+REFERENCE_DATA_MISS_RELOAD_INTERVAL = 5  # seconds
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryRef:
+    id: int
+    category: str
+
+
+@dataclass(frozen=True, slots=True)
+class TagRef:
+    id: int
+    tag: str
+    category_id: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class FeedbackTypeRef:
+    id: int
+    feedback_type: str
+
+
+@dataclass(frozen=True, slots=True)
+class RoleRef:
+    id: int
+    role: str
+
+
+@dataclass(frozen=True, slots=True)
+class ReferenceData:
+    """
+    Immutable snapshot of the small lookup tables: categories, tags, feedback types and roles
+    """
+    categories: Mapping[int, CategoryRef]
+    category_ids: Mapping[str, int]
+    tags: Mapping[int, TagRef]
+    feedback_types: Mapping[int, FeedbackTypeRef]
+    roles: Mapping[int, RoleRef]
+    role_ids: Mapping[str, int]
+
+
+class ReferenceDataCache:
+    """
+    Process wide cache of ReferenceData.
+
+    Loaded at startup, reloaded after invalidate() or once REFERENCE_DATA_TTL has passed.
+    Reloads use their own session so they never interfere with the caller's transaction.
+    """
+    def __init__(self, ttl: float = REFERENCE_DATA_TTL):
+        self.ttl = ttl
+        self._data: ReferenceData | None = None
+        self._expires_at = 0.0
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> ReferenceData:
+        if self._data is None or self._expires_at <= time.monotonic():
+            await self.load()
+        return self._data
+
+    async def lookup(self, table: str, key):
+        """
+        Get one entry, e.g. lookup("tags", tag_id).
+        A miss reloads the snapshot since the row may have been created by another worker.
+        """
+        value = getattr(await self.get(), table).get(key)
+        if value is None and time.monotonic() - self._loaded_at > REFERENCE_DATA_MISS_RELOAD_INTERVAL:
+            self.invalidate()
+            value = getattr(await self.get(), table).get(key)
+        return value
+
+    async def load(self) -> ReferenceData:
+        async with self._lock:
+            # another coroutine may have reloaded while we were waiting
+            if self._data is not None and self._expires_at > time.monotonic():
+                return self._data
+
+            version = self._version
+            async with async_session() as session:
+                categories = await CategoryRepository(session).get_all_categories()
+                tags = await TagRepository(session).get_all_tags()
+                feedback_types = await FeedbackTypeRepository(session).get_all_feedback_types()
+                roles = await RoleRepositroy(session).get_all_roles()
+
+            self._data = ReferenceData(
+                categories=MappingProxyType({
+                    c.id: CategoryRef(id=c.id, category=c.category)
+                    for c in sorted(categories, key=lambda c: c.id)
+                }),
+                category_ids=MappingProxyType({c.category: c.id for c in categories}),
+                tags=MappingProxyType({
+                    t.id: TagRef(id=t.id, tag=t.tag, category_id=t.category_id)
+                    for t in sorted(tags, key=lambda t: t.id)
+                }),
+                feedback_types=MappingProxyType({
+                    f.id: FeedbackTypeRef(id=f.id, feedback_type=f.feedback_type)
+                    for f in sorted(feedback_types, key=lambda f: f.id)
+                }),
+                roles=MappingProxyType({
+                    r.id: RoleRef(id=r.id, role=r.role)
+                    for r in sorted(roles, key=lambda r: r.id)
+                }),
+                role_ids=MappingProxyType({r.role: r.id for r in roles})
+            )
+            self._loaded_at = time.monotonic()
+            # an invalidate() during the load means the snapshot may already be stale
+            if version == self._version:
+                self._expires_at = time.monotonic() + self.ttl
+            return self._data
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._expires_at = 0.0
+
+
+reference_data = ReferenceDataCache()
@@ -1,23 +1,56 @@
+import datetime
+
 from .public.waiters_score import WaiterScoreService
+from .public.waiter_score_daily import WaiterScoreDailyService
 from .public.category import CategoryService
 from .public.tag import TagService
+from .public.feedback import FeedbackService
+from .utils.cache import TTLCache
+from .stats_cache import get_or_set
+from app.model.public.category import POSITIVE_CATEGORY, NEUTRAL_CATEGORY, NEGATIVE_CATEGORY
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+SERIES_GRANULARITIES = {
+    "hour": datetime.timedelta(hours=1),
+    "day": datetime.timedelta(days=1),
+    "week": datetime.timedelta(weeks=1),
+    "month": datetime.timedelta(days=28)
+}
+SERIES_DEFAULT_PERIOD = datetime.timedelta(days=30)
+SERIES_MAX_BUCKETS = 2000
+
+LEADERBOARD_METRICS = ("csat", "avg_score", "feedbacks")
+LEADERBOARD_CACHE_TTL = 30  # seconds
+
+# shared by all requests of this worker, managers refreshing the panel hit memory
+leaderboard_cache = TTLCache(ttl=LEADERBOARD_CACHE_TTL, maxsize=128)
+
+
+def to_naive_local(value: datetime.datetime | None) -> datetime.datetime | None:
+    # created_at is stored as naive local time, "2024-05-01T10:00:00+03:00" is converted instead of compared as is
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
 
 class StatsService:
     def __init__(
         self,
         session: AsyncSession,
         waiter_score_service: WaiterScoreService,
+        waiter_score_daily_service: WaiterScoreDailyService,
         category_service: CategoryService,
-        tag_service: TagService
+        tag_service: TagService,
+        feedback_service: FeedbackService
     ):
         self.session = session
         self.waiter_score_service = waiter_score_service
+        self.waiter_score_daily_service = waiter_score_daily_service
         self.category_service = category_service
         self.tag_service = tag_service
+        self.feedback_service = feedback_service
     
     async def get_stats_dashboard(self, waiter_id: int) -> dict:
         """Get NPS Dashboard, including total feedbacks, CSAT score, MSAT score, total managers feedback
@@ -28,29 +61,23 @@ class StatsService:
         Returns:
             dict: stats Dashboard data
         """
-        try:
-            category_id = await self.category_service.get_id_by_category("положительный")
-           
-            # Get total number of feedbacks
-            positive_feedback = await self.waiter_score_service.count_records_by_filter(
-                filter={
-                    "waiter_id": waiter_id,
-                    "category_id": category_id
-                    }
-            )
-            
-            total_feedbacks = await self.waiter_score_service.count_records_by_filter(
-                filter={
-                    "waiter_id": waiter_id
-                    }
-            )
+        async def compute() -> dict:
+            # total, positive, neutral and negative counts in a single query over the daily rollup
+            counts = await self.waiter_score_daily_service.count_records_by_category(waiter_id)
+            total_feedbacks = counts["total"]
             
             # Get CSAT score
-            response = {
-                "CSAT": round(positive_feedback / total_feedbacks * 100 if total_feedbacks else 0, 1),
-                "total_feedbacks": total_feedbacks
+            return {
+                "CSAT": round(counts["positive"] / total_feedbacks * 100 if total_feedbacks else 0, 1),
+                "total_feedbacks": total_feedbacks,
+                "positive_feedbacks": counts["positive"],
+                "neutral_feedbacks": counts["neutral"],
+                "negative_feedbacks": counts["negative"]
             }
-            return response
+        
+        try:
+            # cached until a feedback about this waiter is created or deleted
+            return await get_or_set(f"dashboard:{waiter_id}", waiter_id, compute)
             
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e)) 
@@ -64,31 +91,151 @@ class StatsService:
         Returns:
             dict: Tags stats
         """
-        try:
-            positive_category_id = await self.category_service.get_id_by_category("положительный")
-            neutral_category_id = await self.category_service.get_id_by_category("нейтральный")
-            negative_category_id = await self.category_service.get_id_by_category("негативный")
-            
+        async def compute() -> dict:
             response = {
-                "положительный": {},
-                "нейтральный": {},
-                "негативный": {}
+                POSITIVE_CATEGORY: {},
+                NEUTRAL_CATEGORY: {},
+                NEGATIVE_CATEGORY: {}
             }
             
-            for category_id, category in [(positive_category_id, "положительный"), (neutral_category_id, "нейтральный"), (negative_category_id, "негативный")]:
-                tags = await self.tag_service.get_tags_by_category_id(category_id)
-                for tag in tags:
-                    tag_id = await self.tag_service.get_tag_by_id(tag.id)
-                    
-                    c = await self.waiter_score_service.count_records_by_tag_id(
-                        **{
-                            "waiter_id": waiter_id,
-                            "tag_id": tag_id
-                        }
-                    )
-                    response[category][tag.tag] = c
+            # one grouped query over all tags instead of a query per tag
+            for category, tag, count in await self.waiter_score_daily_service.count_records_by_tags(waiter_id):
+                response[category][tag] = count
             return response
+        
+        try:
+            return await get_or_set(f"tags:{waiter_id}", waiter_id, compute)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
-                    
-                    
\ No newline at end of file
+        
+    async def get_feedback_series(
+        self,
+        granularity: str = "day",
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        waiter_id: int = None,
+        feedback_type_id: int = None
+    ) -> dict:
+        """Get feedback counts and average scores/ratings bucketed by time, empty buckets included
+
+        Args:
+            granularity (str): hour, day, week or month
+            start_date (datetime): Period start, defaults to 30 days before end_date
+            end_date (datetime): Period end, defaults to now
+            waiter_id (int): Only feedbacks about this waiter
+            feedback_type_id (int): Only ratings of this feedback type
+        
+        Returns:
+            dict: Series data
+        """
+        if granularity not in SERIES_GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"Unknown granularity: {granularity}")
+        
+        start_date, end_date = to_naive_local(start_date), to_naive_local(end_date)
+        end_date = end_date or datetime.datetime.now()
+        start_date = start_date or end_date - SERIES_DEFAULT_PERIOD
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must be before end_date")
+        if (end_date - start_date) / SERIES_GRANULARITIES[granularity] > SERIES_MAX_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"Too many buckets, max is {SERIES_MAX_BUCKETS}")
+        
+        series = await self.feedback_service.get_feedback_series(
+            granularity=granularity,
+            start_date=start_date,
+            end_date=end_date,
+            waiter_id=waiter_id,
+            feedback_type_id=feedback_type_id
+        )
+        return {
+            "granularity": granularity,
+            "start_date": start_date,
+            "end_date": end_date,
+            "series": series
+        }
+        
+    async def get_ratings_heatmap(
+        self,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        feedback_type_id: int = None
+    ) -> dict:
+        """Get average rating by weekday and hour as 7x24 matrices
+
+        Args:
+            start_date (datetime): Period start, defaults to 30 days before end_date
+            end_date (datetime): Period end, defaults to now
+            feedback_type_id (int): Only ratings of this feedback type
+        
+        Returns:
+            dict: ratings[weekday][hour] averages (None without data) and counts[weekday][hour], Monday is 0
+        """
+        start_date, end_date = to_naive_local(start_date), to_naive_local(end_date)
+        end_date = end_date or datetime.datetime.now()
+        start_date = start_date or end_date - SERIES_DEFAULT_PERIOD
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must be before end_date")
+        
+        cells = await self.feedback_service.get_ratings_heatmap(
+            start_date=start_date,
+            end_date=end_date,
+            feedback_type_id=feedback_type_id
+        )
+        ratings = [[None] * 24 for _ in range(7)]
+        counts = [[0] * 24 for _ in range(7)]
+        for weekday, hour, count, avg_rating in cells:
+            ratings[weekday][hour] = round(avg_rating, 2)
+            counts[weekday][hour] = count
+        
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "ratings": ratings,
+            "counts": counts
+        }
+        
+    async def get_leaderboard(
+        self,
+        start_date: datetime.date = None,
+        end_date: datetime.date = None,
+        metric: str = "csat",
+        top_k: int = 10,
+        min_feedbacks: int = 1
+    ) -> dict:
+        """Rank waiters by CSAT, average waiter score or feedback volume over a period
+
+        Args:
+            start_date (date): Period start, defaults to 30 days before end_date
+            end_date (date): Period end, defaults to today
+            metric (str): csat, avg_score or feedbacks
+            top_k (int): Number of waiters to return
+            min_feedbacks (int): Skip waiters with fewer feedbacks in the period
+        
+        Returns:
+            dict: Leaderboard, results are cached for LEADERBOARD_CACHE_TTL seconds
+        """
+        if metric not in LEADERBOARD_METRICS:
+            raise HTTPException(status_code=400, detail=f"Unknown metric: {metric}")
+        
+        end_date = end_date or datetime.date.today()
+        start_date = start_date or end_date - SERIES_DEFAULT_PERIOD
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must be before end_date")
+        
+        key = (start_date, end_date, metric, top_k, min_feedbacks)
+        response = leaderboard_cache.get(key)
+        if response is None:
+            waiters = await self.waiter_score_daily_service.get_leaderboard(
+                start_day=start_date,
+                end_day=end_date,
+                metric=metric,
+                top_k=top_k,
+                min_feedbacks=min_feedbacks
+            )
+            response = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "metric": metric,
+                "waiters": waiters
+            }
+            leaderboard_cache.set(key, response)
+        return response
@@ -0,0 +1,37 @@
+from app.config import stats_cache_url, stats_cache_ttl
+from app.service.utils.cache import create_cache_backend
+
+# StatsService results, evicted per waiter by FeedbackService writes
+stats_cache = create_cache_backend(stats_cache_url, namespace="stats")
+
+# a generation only has to outlive the slowest compute, a day keeps counters from restarting under it
+GENERATION_TTL = 24 * 3600  # seconds
+
+
+def waiter_tag(waiter_id: int) -> str:
+    return f"waiter:{waiter_id}"
+
+
+def generation_key(waiter_id: int) -> str:
+    return f"generation:{waiter_id}"
+
+
+async def get_or_set(key: str, waiter_id: int, compute):
+    """
+    Return the cached value of key or await compute() and cache it under the waiter's tag.
+    A result is only cached when the waiter was not invalidated while it was computed,
+    otherwise it may predate the write and would stay stale until its ttl.
+    """
+    value = await stats_cache.get(key)
+    if value is None:
+        generation = await stats_cache.get(generation_key(waiter_id))
+        value = await compute()
+        if await stats_cache.get(generation_key(waiter_id)) == generation:
+            await stats_cache.set(key, value, ttl=stats_cache_ttl, tags=[waiter_tag(waiter_id)])
+    return value
+
+
+async def invalidate_waiters(waiter_ids) -> None:
+    for waiter_id in set(waiter_ids):
+        await stats_cache.incr(generation_key(waiter_id), ttl=GENERATION_TTL)
+        await stats_cache.invalidate_tag(waiter_tag(waiter_id))
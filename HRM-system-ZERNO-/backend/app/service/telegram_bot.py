@@ -1,16 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repository.public.category import CategoryRepository
-from app.repository.public.tag import TagRepository
 from app.repository.public.user import UserRepository
 from app.repository.public.feedbacks import FeedbackRepository
-from app.repository.public.feedback_type import FeedbackTypeRepository
 
-import httpx
-from app.config import telegram_token
 from app.model import Feedback
 
-from app.schema.emps.feedbacks import FeedbackUpdate
+from app.service.reference_data import reference_data
 
 
 class TelegramFormatMessageService:
@@ -18,36 +13,85 @@ class TelegramFormatMessageService:
         self,
         session: AsyncSession,
         feedback_repo: FeedbackRepository,
-        feedback_type_repo: FeedbackTypeRepository,
-        user_repo: UserRepository, 
-        category_repo: CategoryRepository,
-        tag_repo: TagRepository   
+        user_repo: UserRepository
     ):
         self.session = session
         self.feedback_repo = feedback_repo
-        self.feedback_type_repo = feedback_type_repo
         self.user_repo = user_repo
-        self.category_repo = category_repo
-        self.tag_repo = tag_repo
         
     async def format_feedback(
         self, 
-        feedback
-    ):
-        ratings = []
- 
-        for rating in feedback.ratings:
-            feedback_type = await self.feedback_type_repo.get_feedback_type_by_id(rating.feedback_type_id)
-            ratings.append(f"Категория: {feedback_type.feedback_type},\nОценка: {rating.rating}")
-            
-        user = (await self.user_repo.get_user_by_id(feedback.waiter_score.waiter_id) )if feedback.waiter_score else None
-        first_name = user.first_name if user else None
-        second_name = user.second_name if user else None
+        feedback: Feedback
+    ) -> str:
+        return (await self.format_feedbacks([feedback]))[0]
+    
+    async def format_feedbacks(
+        self,
+        feedbacks: list[Feedback]
+    ) -> list[str]:
+        """
+        Format already loaded feedbacks, e.g. the ones just created.
+        Waiter names come from one query for the whole batch, everything else from the reference data cache.
+        """
+        waiters = await self.user_repo.get_user_names({
+            feedback.waiter_score.waiter_id for feedback in feedbacks if feedback.waiter_score
+        })
+        return [
+            await self._format(feedback, waiters.get(feedback.waiter_score.waiter_id) if feedback.waiter_score else None)
+            for feedback in feedbacks
+        ]
+    
+    async def format_feedbacks_by_id(
+        self,
+        feedback_ids: list[int],
+        digest: bool = False
+    ) -> dict[int, str]:
+        """
+        Load the feedbacks together with their waiters in one joined query and format them,
+        digest=True gives the one line form used in digest summaries.
+        Feedbacks that no longer exist are missing from the result.
+        """
+        feedbacks = await self.feedback_repo.get_feedbacks_by_ids(feedback_ids)
+        format = self._format_line if digest else self._format
+        texts = {}
+        for feedback in feedbacks:
+            user = feedback.waiter_score.user if feedback.waiter_score else None
+            texts[feedback.id] = await format(feedback, (user.first_name, user.second_name) if user else None)
+        return texts
+    
+    @staticmethod
+    def format_digest(lines: list[str]) -> str:
+        return f"📬 Сводка отзывов: {len(lines)}\n\n" + "\n".join(lines)
+    
+    async def _format_line(
+        self,
+        feedback: Feedback,
+        waiter: tuple[str, str] | None
+    ) -> str:
+        score = feedback.waiter_score
+        tag = (await reference_data.lookup("tags", score.tag_id)) if score else None
+        waiter_name = " ".join(waiter) if waiter else "Не указан"
+        line = f"№{feedback.id} {feedback.created_at.strftime('%H:%M')} ⭐{score.score if score else '-'} {waiter_name}"
+        if tag:
+            line += f" 🏷 {tag.tag}"
+        if score and score.comment:
+            comment = score.comment if len(score.comment) <= 80 else score.comment[:79] + "…"
+            line += f" 💬 {comment}"
+        return line
+        
+    async def _format(
+        self,
+        feedback: Feedback,
+        waiter: tuple[str, str] | None
+    ) -> str:
+        first_name, second_name = waiter if waiter else (None, None)
         phone = feedback.contact.phone if feedback.contact else None
         comment = feedback.waiter_score.comment if feedback.waiter_score else None
         score = feedback.waiter_score.score if feedback.waiter_score else None
-        category = (await self.category_repo.get_category_by_id(feedback.waiter_score.category_id)).category if feedback.waiter_score.category_id else None
-        tag = (await self.tag_repo.get_tag_by_id(feedback.waiter_score.tag_id)).tag if feedback.waiter_score.tag_id else None
+        category = (await reference_data.lookup("categories", feedback.waiter_score.category_id)) if feedback.waiter_score else None
+        tag = (await reference_data.lookup("tags", feedback.waiter_score.tag_id)) if feedback.waiter_score else None
+        category = category.category if category else None
+        tag = tag.tag if tag else None
         
         return (
             f"📝 Отзыв №{feedback.id}\n"
@@ -61,8 +105,3 @@ class TelegramFormatMessageService:
             f"💬 Комментарий:\n"
             f"{comment if comment else 'Не оставлен'}\n"
         )
-
-
-            
-
-        
\ No newline at end of file
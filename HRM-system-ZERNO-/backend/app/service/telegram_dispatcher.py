@@ -0,0 +1,387 @@
+import asyncio
+import datetime
+import logging
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from app.config import (
+    telegram_bot_token,
+    telegram_api_url,
+    telegram_concurrency,
+    telegram_rate_per_second,
+    telegram_chat_rate_per_minute,
+    telegram_rate_limit_url,
+    telegram_workers,
+    telegram_max_attempts,
+    telegram_digest_seconds,
+    telegram_digest_max_items,
+    telegram_urgent_max_score
+)
+from app.db.db import async_session
+from app.model import Feedback, TelegramOutbox
+from app.model.public.category import NEGATIVE_CATEGORY
+from app.repository.public.feedbacks import FeedbackRepository
+from app.repository.public.telegram_outbox import TelegramOutboxRepository
+from app.repository.public.user import UserRepository
+from app.service.reference_data import reference_data
+from app.service.telegram_bot import TelegramFormatMessageService
+from app.service.utils.metrics import Counter, Histogram
+from app.service.utils.rate_limit import RateLimiter, TokenBucket, create_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than this
+TELEGRAM_MESSAGE_LIMIT = 4096
+# room left for the summary header of a digest message
+DIGEST_HEADER_RESERVE = 64
+TELEGRAM_BATCH_SIZE = 100
+# claimed rows are hidden from other dispatchers for this long, it must cover sending a whole batch
+TELEGRAM_LEASE = datetime.timedelta(minutes=5)
+TELEGRAM_POLL_INTERVAL = 5  # seconds
+TELEGRAM_MAX_BACKOFF = 600  # seconds
+
+telegram_send_seconds = Histogram(
+    "telegram_send_seconds",
+    "Duration of sendMessage calls by outcome",
+    labelnames=("outcome",)
+)
+
+
+class TelegramDispatcher:
+    """
+    Delivers the telegram_outbox.
+
+    Due rows are claimed in batches, formatted with one query and sent over one keep-alive client.
+    Rows of the same chat are packed into as few messages as fit and sent in order,
+    limited by a per bot and a per chat token bucket and by the number of chats sent to concurrently.
+    Telegram's limits hold for the bot as a whole: with a shared rate_limiter every message also takes a token
+    from the buckets all processes share, without one the rates are split evenly between workers.
+    429 and 5xx are retried with exponential backoff, other client errors mark the rows failed.
+    In digest mode (digest_seconds > 0) non urgent notifications are held and sent as one summary per chat
+    once the oldest has waited digest_seconds, the chat has digest_max_items of them or an urgent one goes out.
+    Safe to run in several processes, claims skip rows locked or leased by another dispatcher.
+    """
+    def __init__(
+        self,
+        token: str | None,
+        api_url: str = "https://api.telegram.org",
+        concurrency: int = 4,
+        rate_per_second: float = 25,
+        chat_rate_per_minute: float = 20,
+        max_attempts: int = 8,
+        digest_seconds: int = 0,
+        digest_max_items: int = 20,
+        urgent_max_score: int = 2,
+        rate_limiter: RateLimiter | None = None,
+        workers: int = 1
+    ):
+        self.token = token
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.rate_per_second = rate_per_second
+        self.chat_rate_per_minute = chat_rate_per_minute
+        self.rate_limiter = rate_limiter
+        # the local buckets only have to be exact when nothing else limits the other processes
+        self._share = 1 if rate_limiter else max(workers, 1)
+        self.max_attempts = max_attempts
+        self.digest_seconds = digest_seconds
+        self.digest_max_items = digest_max_items
+        self.urgent_max_score = urgent_max_score
+        self.metrics = {
+            "messages_sent": 0,
+            "digests_sent": 0,
+            "notifications_delivered": 0,
+            "notifications_failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "errors": 0
+        }
+        self._bot_bucket = TokenBucket(rate_per_second / self._share, capacity=rate_per_second / self._share)
+        self._chat_buckets: dict[str, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client: httpx.AsyncClient | None = None
+        self._worker: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self) -> None:
+        if not self.token:
+            logger.warning("TELEGRAM_BOT_TOKEN is not set, Telegram notifications stay in the outbox")
+            return
+        if self._worker is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_url,
+                timeout=httpx.Timeout(10),
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def hold_until(self, feedback: Feedback) -> datetime.datetime | None:
+        """
+        When a notification about the feedback may be sent as part of a digest, None to send it right away.
+        """
+        if not self.digest_seconds:
+            return None
+        score = feedback.waiter_score
+        if score:
+            if score.score <= self.urgent_max_score:
+                return None
+            category = await reference_data.lookup("categories", score.category_id)
+            if category and category.category == NEGATIVE_CATEGORY:
+                return None
+        if any(rating.rating <= self.urgent_max_score for rating in feedback.ratings):
+            return None
+        return datetime.datetime.now() + datetime.timedelta(seconds=self.digest_seconds)
+
+    def wake(self) -> None:
+        """
+        Dispatch now instead of at the next poll, called after new rows are committed.
+        """
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Telegram dispatch failed")
+                self.metrics["errors"] += 1
+                claimed = 0
+            # a full batch means more rows may be due already
+            if claimed < TELEGRAM_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), TELEGRAM_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_once(self) -> int:
+        async with async_session() as session:
+            outbox_repo = TelegramOutboxRepository(session)
+            async with session.begin():
+                rows = await outbox_repo.claim_due(
+                    TELEGRAM_BATCH_SIZE,
+                    TELEGRAM_LEASE,
+                    digest_max_items=self.digest_max_items if self.digest_seconds else None
+                )
+            if not rows:
+                return 0
+
+            formatter = TelegramFormatMessageService(
+                session=session,
+                feedback_repo=FeedbackRepository(session),
+                user_repo=UserRepository(session)
+            )
+            texts, lines = {}, {}
+            async with session.begin():
+                feedback_ids = sorted({row.feedback_id for row in rows if not row.digest})
+                if feedback_ids:
+                    texts = await formatter.format_feedbacks_by_id(feedback_ids)
+                feedback_ids = sorted({row.feedback_id for row in rows if row.digest})
+                if feedback_ids:
+                    lines = await formatter.format_feedbacks_by_id(feedback_ids, digest=True)
+
+            by_chat: dict[str, list[TelegramOutbox]] = defaultdict(list)
+            for row in rows:
+                by_chat[row.chat_id].append(row)
+            results = await asyncio.gather(*(
+                self._send_chat(chat_id, chat_rows, texts, lines) for chat_id, chat_rows in by_chat.items()
+            ))
+
+            async with session.begin():
+                for sent, retry, failed in results:
+                    await outbox_repo.delete_sent(sent)
+                    for next_attempt_at, (ids, error) in retry.items():
+                        await outbox_repo.reschedule(ids, next_attempt_at, error)
+                    for error, ids in failed.items():
+                        await outbox_repo.mark_failed(ids, error)
+            return len(rows)
+
+    async def _send_chat(
+        self,
+        chat_id: str,
+        rows: list[TelegramOutbox],
+        texts: dict[int, str],
+        lines: dict[int, str]
+    ) -> tuple[list[int], dict, dict]:
+        """
+        Send the rows of one chat in order, the full messages first and then the digest.
+        Returns the ids to delete, {next_attempt_at: (ids, error)} to retry and {error: ids} that failed for good.
+        """
+        sent, retry, failed = [], {}, defaultdict(list)
+
+        full_rows = [row for row in rows if not row.digest]
+        digest_rows = [row for row in rows if row.digest]
+        # the feedback was deleted after the row was claimed, nothing to send
+        sent.extend(row.id for row in full_rows if row.feedback_id not in texts)
+        sent.extend(row.id for row in digest_rows if row.feedback_id not in lines)
+        messages = (
+            self._pack([row for row in full_rows if row.feedback_id in texts], texts)
+            + self._pack([row for row in digest_rows if row.feedback_id in lines], lines, digest=True)
+        )
+
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate_per_minute / 60 / self._share, capacity=1)
+
+        for index, (message_rows, text) in enumerate(messages):
+            await bucket.acquire()
+            await self._bot_bucket.acquire()
+            if self.rate_limiter:
+                await self._acquire_shared(f"chat:{chat_id}", self.chat_rate_per_minute / 60, 1)
+                await self._acquire_shared("bot", self.rate_per_second, self.rate_per_second)
+            async with self._semaphore:
+                status, retry_after, error = await self._send(chat_id, text)
+            ids = [row.id for row in message_rows]
+
+            if status == "sent":
+                sent.extend(ids)
+                self.metrics["messages_sent"] += 1
+                if message_rows[0].digest:
+                    self.metrics["digests_sent"] += 1
+                self.metrics["notifications_delivered"] += len(ids)
+                continue
+            if status == "failed":
+                failed[error].extend(ids)
+                self.metrics["notifications_failed"] += len(ids)
+                continue
+
+            # keep the chat in order, everything after a retryable error waits as well
+            pending = [row for rows_, _ in messages[index:] for row in rows_]
+            attempts = max(row.attempts for row in pending)
+            if attempts >= self.max_attempts:
+                failed[error].extend(row.id for row in pending)
+                self.metrics["notifications_failed"] += len(pending)
+                break
+            if retry_after is None:
+                retry_after = min(2 ** attempts, TELEGRAM_MAX_BACKOFF) * random.uniform(0.8, 1.2)
+            else:
+                bucket.penalize(retry_after)
+            next_attempt_at = datetime.datetime.now() + datetime.timedelta(seconds=retry_after)
+            retry[next_attempt_at] = ([row.id for row in pending], error)
+            self.metrics["retries"] += len(pending)
+            break
+
+        return sent, retry, failed
+
+    async def _acquire_shared(self, key: str, rate: float, capacity: float) -> None:
+        while wait := await self.rate_limiter.hit(key, rate, capacity):
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _pack(
+        rows: list[TelegramOutbox],
+        texts: dict[int, str],
+        digest: bool = False
+    ) -> list[tuple[list[TelegramOutbox], str]]:
+        """
+        Join the texts of consecutive rows into messages that fit TELEGRAM_MESSAGE_LIMIT,
+        digest rows are one line each under a summary header. Only a text too long for a message of its own is cut.
+        """
+        limit = TELEGRAM_MESSAGE_LIMIT - (DIGEST_HEADER_RESERVE if digest else 0)
+        chunks: list[tuple[list[TelegramOutbox], list[str]]] = []
+        size = 0
+        for row in rows:
+            text = TelegramDispatcher._truncate(texts[row.feedback_id], limit)
+            length = TelegramDispatcher._length(text)
+            if chunks and size + 1 + length <= limit:
+                chunks[-1][0].append(row)
+                chunks[-1][1].append(text)
+                size += 1 + length
+            else:
+                chunks.append(([row], [text]))
+                size = length
+        if digest:
+            return [
+                (chunk_rows, TelegramFormatMessageService.format_digest(chunk_texts))
+                for chunk_rows, chunk_texts in chunks
+            ]
+        return [(chunk_rows, "\n".join(chunk_texts)) for chunk_rows, chunk_texts in chunks]
+
+    @staticmethod
+    def _length(text: str) -> int:
+        # Telegram counts UTF-16 code units, emoji take two
+        return len(text.encode("utf-16-le")) // 2
+
+    @staticmethod
+    def _truncate(text: str, limit: int) -> str:
+        if TelegramDispatcher._length(text) <= limit:
+            return text
+        # cut on a code unit boundary, a dangling half of a surrogate pair is dropped
+        return text.encode("utf-16-le")[:(limit - 1) * 2].decode("utf-16-le", errors="ignore") + "…"
+
+    async def _send(self, chat_id: str, text: str) -> tuple[str, float | None, str | None]:
+        """
+        One sendMessage call. Returns ("sent" | "retry" | "failed", retry_after, error).
+        """
+        start = time.perf_counter()
+        status, retry_after, error = await self._send_message(chat_id, text)
+        telegram_send_seconds.labels(outcome=status).observe(time.perf_counter() - start)
+        return status, retry_after, error
+
+    async def _send_message(self, chat_id: str, text: str) -> tuple[str, float | None, str | None]:
+        try:
+            response = await self._client.post(
+                f"/bot{self.token}/sendMessage",
+                json={"chat_id": chat_id, "text": text}
+            )
+        except httpx.HTTPError as e:
+            # the exception text may contain the url and with it the bot token
+            return "retry", None, f"{type(e).__name__}"
+
+        if response.status_code == 200:
+            return "sent", None, None
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        error = f"{response.status_code}: {body.get('description', response.reason_phrase)}"
+        if response.status_code == 429:
+            self.metrics["rate_limited"] += 1
+            retry_after = (body.get("parameters") or {}).get("retry_after") or response.headers.get("Retry-After")
+            return "retry", float(retry_after) if retry_after else None, error
+        if response.status_code >= 500:
+            return "retry", None, error
+        logger.error("Telegram rejected a message to chat %s: %s", chat_id, error)
+        return "failed", None, error
+
+
+telegram_dispatcher = TelegramDispatcher(
+    token=telegram_bot_token,
+    api_url=telegram_api_url,
+    concurrency=telegram_concurrency,
+    rate_per_second=telegram_rate_per_second,
+    chat_rate_per_minute=telegram_chat_rate_per_minute,
+    max_attempts=telegram_max_attempts,
+    digest_seconds=telegram_digest_seconds,
+    digest_max_items=telegram_digest_max_items,
+    urgent_max_score=telegram_urgent_max_score,
+    rate_limiter=(
+        create_rate_limiter(telegram_rate_limit_url, namespace="telegram")
+        if telegram_rate_limit_url.startswith("redis://") else None
+    ),
+    workers=telegram_workers
+)
+
+Counter(
+    "telegram_dispatcher_events_total",
+    "Telegram dispatcher counters: messages_sent, digests_sent, notifications_delivered, "
+    "notifications_failed, retries, rate_limited and errors",
+    labelnames=("event",),
+    function=lambda: {(event,): count for event, count in telegram_dispatcher.metrics.items()}
+)
@@ -0,0 +1,215 @@
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from .redis import RedisClient, RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small in-process cache with a per-entry time to live and a size bound.
+    Entries are evicted least recently used first once maxsize is reached.
+    on_evict is called with the key of every entry dropped because it expired or was evicted.
+    """
+    def __init__(self, ttl: float, maxsize: int = 256, on_evict: Callable[[Hashable], None] | None = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            if self.on_evict:
+                self.on_evict(key)
+            return default
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(evicted)
+            
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+            
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class CacheBackend(ABC):
+    """
+    Async key-value cache with tag based invalidation.
+    Values must be JSON serializable so every backend stores the same data.
+    """
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        pass
+    
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float, tags: list[str] = ()) -> None:
+        pass
+    
+    @abstractmethod
+    async def add(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        Atomically set key only if it is absent, returns whether it was set
+        """
+    
+    @abstractmethod
+    async def incr(self, key: str, ttl: float) -> int | None:
+        """
+        Atomically increment the counter at key, absent counts as 0, and restart its time to live.
+        Returns the new value, None when the backend is unavailable.
+        """
+    
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+    
+    @abstractmethod
+    async def invalidate_tag(self, tag: str) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    LRU cache of the current worker, use it for single worker deployments
+    """
+    def __init__(self, maxsize: int = 4096):
+        self._cache = TTLCache(ttl=0, maxsize=maxsize, on_evict=self._forget)
+        self._tags: dict[str, set[str]] = {}
+        # reverse of _tags, so that evicted keys can be removed from their tags
+        self._key_tags: dict[str, set[str]] = {}
+        
+    async def get(self, key: str) -> Any:
+        value = self._cache.get(key)
+        # values are stored as JSON so callers never share mutable objects
+        return json.loads(value) if value is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: float, tags: list[str] = ()) -> None:
+        self._cache.set(key, json.dumps(value, default=str), ttl=ttl)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+            self._key_tags.setdefault(key, set()).add(tag)
+    
+    async def add(self, key: str, value: Any, ttl: float) -> bool:
+        # nothing awaits in between, so check and set cannot interleave with another task
+        if self._cache.get(key) is not None:
+            return False
+        self._cache.set(key, json.dumps(value, default=str), ttl=ttl)
+        return True
+    
+    async def incr(self, key: str, ttl: float) -> int:
+        value = self._cache.get(key)
+        value = (json.loads(value) if value is not None else 0) + 1
+        self._cache.set(key, json.dumps(value), ttl=ttl)
+        return value
+    
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+        self._forget(key)
+    
+    async def invalidate_tag(self, tag: str) -> None:
+        for key in self._tags.pop(tag, ()):
+            self._cache.delete(key)
+            self._forget(key)
+    
+    def _forget(self, key: str) -> None:
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache shared by all workers through a Redis protocol server.
+    Errors are logged and treated as cache misses, the database stays the source of truth.
+    """
+    def __init__(self, client: RedisClient, namespace: str):
+        self.client = client
+        self.namespace = namespace
+        
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+    
+    def _tag(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+        
+    async def get(self, key: str) -> Any:
+        try:
+            value = await self.client.execute("GET", self._key(key))
+        except RedisError as e:
+            logger.warning("cache get failed: %s", e)
+            return None
+        return json.loads(value) if value is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: float, tags: list[str] = ()) -> None:
+        commands = [("SET", self._key(key), json.dumps(value, default=str), "PX", int(ttl * 1000))]
+        for tag in tags:
+            commands.append(("SADD", self._tag(tag), self._key(key)))
+            commands.append(("PEXPIRE", self._tag(tag), int(ttl * 1000)))
+        try:
+            await self.client.pipeline(commands)
+        except RedisError as e:
+            logger.warning("cache set failed: %s", e)
+    
+    async def add(self, key: str, value: Any, ttl: float) -> bool:
+        try:
+            reply = await self.client.execute(
+                "SET", self._key(key), json.dumps(value, default=str), "PX", int(ttl * 1000), "NX"
+            )
+        except RedisError as e:
+            # without the cache the caller just goes ahead as if the key were new
+            logger.warning("cache add failed: %s", e)
+            return True
+        return reply is not None
+    
+    async def incr(self, key: str, ttl: float) -> int | None:
+        try:
+            value, _ = await self.client.pipeline([
+                ("INCR", self._key(key)),
+                ("PEXPIRE", self._key(key), int(ttl * 1000))
+            ])
+        except RedisError as e:
+            logger.warning("cache incr failed: %s", e)
+            return None
+        return value
+    
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.execute("DEL", self._key(key))
+        except RedisError as e:
+            logger.warning("cache delete failed: %s", e)
+    
+    async def invalidate_tag(self, tag: str) -> None:
+        try:
+            keys = await self.client.execute("SMEMBERS", self._tag(tag))
+            await self.client.execute("DEL", self._tag(tag), *keys)
+        except RedisError as e:
+            logger.warning("cache invalidation failed: %s", e)
+
+
+def create_cache_backend(url: str | None, namespace: str, maxsize: int = 4096) -> CacheBackend:
+    """
+    memory:// (or empty) -> MemoryCacheBackend, redis://[:password@]host[:port][/db] -> RedisCacheBackend
+    """
+    if url and url.startswith("redis://"):
+        return RedisCacheBackend(RedisClient.from_url(url), namespace=namespace)
+    return MemoryCacheBackend(maxsize=maxsize)
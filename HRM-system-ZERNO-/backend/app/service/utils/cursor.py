@@ -0,0 +1,23 @@
+import base64
+import binascii
+import datetime
+
+
+def encode_cursor(created_at: datetime.datetime, id: int) -> str:
+    """
+    Opaque keyset cursor for the (created_at, id) ordering of feedbacks.
+    """
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """
+    Inverse of encode_cursor, raises ValueError on a malformed token.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from passlib.context import CryptContext
+
+from app.config import password_hash_rounds, password_hash_workers
+from app.service.utils.metrics import Gauge, Histogram
+
+password_hash_queue_seconds = Histogram(
+    "password_hash_queue_seconds",
+    "Time a bcrypt call waited for a free hashing thread",
+    labelnames=("operation",)
+)
+password_hash_seconds = Histogram(
+    "password_hash_seconds",
+    "Duration of bcrypt calls on the hashing threads",
+    labelnames=("operation",)
+)
+password_hash_pending = Gauge(
+    "password_hash_pending",
+    "bcrypt calls queued or running",
+    labelnames=("operation",)
+)
+
+
+class PasswordHasher:
+    """
+    bcrypt on a dedicated thread pool, so that hashing never blocks the event loop.
+
+    bcrypt releases the GIL, at most max_workers hashes run in parallel and the rest wait in the pool's queue.
+    Hashes made with a cost other than rounds are reported by verify_and_update for rehashing.
+    """
+    def __init__(self, rounds: int = 12, max_workers: int = 2):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Returns whether password matches and, when the stored hash uses an outdated cost, a new hash to save
+        """
+        return await self._run("verify", self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, operation: str, function: Callable, *args):
+        pending = password_hash_pending.labels(operation=operation)
+        submitted_at = time.perf_counter()
+
+        def timed():
+            started_at = time.perf_counter()
+            password_hash_queue_seconds.labels(operation=operation).observe(started_at - submitted_at)
+            try:
+                return function(*args)
+            finally:
+                password_hash_seconds.labels(operation=operation).observe(time.perf_counter() - started_at)
+
+        pending.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            pending.dec()
+
+
+password_hasher = PasswordHasher(rounds=password_hash_rounds, max_workers=password_hash_workers)
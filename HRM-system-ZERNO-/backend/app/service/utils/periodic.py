@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs func every interval seconds in the background, a failing run is logged and the next one goes ahead.
+    """
+    def __init__(self, func: Callable[[], Awaitable[None]], interval: float):
+        self.func = func
+        self.interval = interval
+        self._worker: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed", getattr(self.func, "__name__", self.func))
+            await asyncio.sleep(self.interval)
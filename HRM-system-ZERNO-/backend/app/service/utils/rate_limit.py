@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+
+from .cache import TTLCache
+from .redis import RedisClient, RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: rate tokens per second, at most capacity stored for bursts.
+    """
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens if available. Returns 0 on success, otherwise the seconds until they will be.
+        """
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0
+        return (tokens - self._tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """
+        Wait until tokens are available and take them, waiters are served in order.
+        """
+        async with self._lock:
+            while True:
+                wait = self.try_acquire(tokens)
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Hold the bucket empty for seconds, e.g. after the remote side asked to retry later.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class RateLimiter(ABC):
+    """
+    Token buckets addressed by key, e.g. one per client and route.
+    """
+    @abstractmethod
+    async def hit(self, key: str, rate: float, capacity: float) -> float:
+        """
+        Take one token from the bucket of key. Returns 0 on success, otherwise the seconds until one is available.
+        """
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Buckets of the current worker, with several workers every one of them allows the full rate
+    """
+    def __init__(self, maxsize: int = 100000):
+        # an evicted or expired bucket would have been full again anyway
+        self._buckets = TTLCache(ttl=0, maxsize=maxsize)
+
+    async def hit(self, key: str, rate: float, capacity: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+        wait = bucket.try_acquire()
+        self._buckets.set(key, bucket, ttl=capacity / rate)
+        return wait
+
+
+# the bucket is a hash of tokens and the time they were counted, kept until it would be full again;
+# the result is a string since Lua numbers are truncated to integers in replies
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Buckets shared by all workers, updated atomically by a script on a Redis protocol server.
+    Errors are logged and the request is let through, limiting is best effort.
+    """
+    def __init__(self, client: RedisClient, namespace: str):
+        self.client = client
+        self.namespace = namespace
+
+    async def hit(self, key: str, rate: float, capacity: float) -> float:
+        try:
+            wait = await self.client.execute(
+                "EVAL", TOKEN_BUCKET_SCRIPT, 1, f"{self.namespace}:{key}", rate, capacity
+            )
+        except RedisError as e:
+            logger.warning("rate limit check failed: %s", e)
+            return 0
+        return float(wait)
+
+
+def create_rate_limiter(url: str | None, namespace: str) -> RateLimiter:
+    """
+    memory:// (or empty) -> MemoryRateLimiter, redis://[:password@]host[:port][/db] -> RedisRateLimiter
+    """
+    if url and url.startswith("redis://"):
+        return RedisRateLimiter(RedisClient.from_url(url), namespace=namespace)
+    return MemoryRateLimiter()
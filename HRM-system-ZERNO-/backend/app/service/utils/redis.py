@@ -0,0 +1,141 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+# after a connection failure calls fail fast for this long instead of waiting on the timeout again
+RECONNECT_BACKOFF = 5  # seconds
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisClient:
+    """
+    Minimal asyncio client for the Redis protocol (RESP2).
+
+    Keeps one connection open, reconnects on failure and sends pipelines in a single round trip.
+    Works with Redis, Valkey, KeyDB or any server speaking the same protocol.
+    """
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        timeout: float = 1.0
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._retry_at = 0.0
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 1.0) -> "RedisClient":
+        """redis://[:password@]host[:port][/db]"""
+        parts = urlsplit(url)
+        db = parts.path.lstrip("/")
+        return cls(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(db) if db else 0,
+            password=parts.password,
+            timeout=timeout
+        )
+
+    async def execute(self, *args):
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: list[tuple]) -> list:
+        async with self._lock:
+            if self._writer is None and time.monotonic() < self._retry_at:
+                raise RedisError("Redis unavailable, waiting before reconnecting")
+            try:
+                if self._writer is None:
+                    await self._connect()
+                return await asyncio.wait_for(self._send(commands), self.timeout)
+            except RedisError:
+                raise
+            except Exception as e:
+                # the connection state is unknown after a timeout or socket error
+                await self._close()
+                self._retry_at = time.monotonic() + RECONNECT_BACKOFF
+                raise RedisError(str(e) or type(e).__name__) from e
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._close()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        handshake = []
+        if self.password:
+            handshake.append(("AUTH", self.password))
+        if self.db:
+            handshake.append(("SELECT", self.db))
+        if handshake:
+            try:
+                await asyncio.wait_for(self._send(handshake), self.timeout)
+            except Exception:
+                await self._close()
+                raise
+
+    async def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+        self._reader = self._writer = None
+
+    async def _send(self, commands: list[tuple]) -> list:
+        self._writer.write(b"".join(self._encode(command) for command in commands))
+        await self._writer.drain()
+        replies = [await self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def _encode(command: tuple) -> bytes:
+        out = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            if isinstance(arg, bytes):
+                data = arg
+            else:
+                data = str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply: {line!r}")
@@ -1,11 +1,8 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
 from app.config import secret_key, algorithm, access_token_expire_minutes
 from jose import ExpiredSignatureError
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -14,9 +11,6 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm)
     return encoded_jwt
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 
 def jwt_decode(token: str):
     try:
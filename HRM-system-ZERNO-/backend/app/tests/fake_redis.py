@@ -0,0 +1,98 @@
+import asyncio
+
+
+class FakeRedis:
+    """
+    In-process server speaking enough of RESP2 for RedisClient and RedisCacheBackend.
+    Every received command is recorded, expiry is ignored.
+    """
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.data: dict[bytes, object] = {}
+        self.commands: list[list[bytes]] = []
+        self.connections = 0
+        self.server: asyncio.AbstractServer | None = None
+        self.port: int | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> "FakeRedis":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        authenticated = self.password is None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    command.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(command)
+                name = command[0].upper()
+                if name == b"AUTH":
+                    authenticated = command[1].decode() == self.password
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required\r\n")
+                else:
+                    writer.write(self._reply(self._run(name, command[1:])))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _run(self, name: bytes, args: list[bytes]):
+        if name in (b"SELECT", b"PEXPIRE"):
+            return "OK" if name == b"SELECT" else int(args[0] in self.data)
+        if name == b"GET":
+            return self.data.get(args[0])
+        if name == b"SET":
+            if b"NX" in (arg.upper() for arg in args[2:]) and args[0] in self.data:
+                return None
+            self.data[args[0]] = args[1]
+            return "OK"
+        if name == b"INCR":
+            value = int(self.data.get(args[0], b"0")) + 1
+            self.data[args[0]] = str(value).encode()
+            return value
+        if name == b"DEL":
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == b"SADD":
+            members = self.data.setdefault(args[0], set())
+            before = len(members)
+            members.update(args[1:])
+            return len(members) - before
+        if name == b"SMEMBERS":
+            return list(self.data.get(args[0], ()))
+        return Exception(f"ERR unknown command '{name.decode()}'")
+
+    def _reply(self, value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, Exception):
+            return b"-%s\r\n" % str(value).encode()
+        if isinstance(value, str):
+            return b"+%s\r\n" % value.encode()
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"*%d\r\n" % len(value) + b"".join(self._reply(item) for item in value)
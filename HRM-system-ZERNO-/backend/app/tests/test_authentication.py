@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.service import authentication
+from app.service.authentication import AuthenticationService
+from app.service.utils.utils import jwt_decode
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def make_service(user, session: FakeSession, refresh_tokens: list) -> AuthenticationService:
+    async def get_user_by_email(email):
+        return user
+
+    async def get_role_by_id(role_id):
+        return SimpleNamespace(role="waiter" if role_id == 2 else None)
+
+    async def create_refresh_token(**values):
+        refresh_tokens.append(values)
+
+    return AuthenticationService(
+        session=session,
+        user_service=SimpleNamespace(get_user_by_email=get_user_by_email),
+        role_service=SimpleNamespace(get_role_by_id=get_role_by_id),
+        refresh_token_repo=SimpleNamespace(create_refresh_token=create_refresh_token)
+    )
+
+
+def test_failed_rehash_does_not_fail_login(monkeypatch):
+    async def verify_and_update(password, hashed_password):
+        return True, "rehashed"
+
+    def unavailable_session():
+        raise ConnectionRefusedError("database unavailable")
+
+    monkeypatch.setattr(authentication.password_hasher, "verify_and_update", verify_and_update)
+    monkeypatch.setattr(authentication, "async_session", unavailable_session)
+
+    user = SimpleNamespace(id=1, role_id=2, token_version=3, hashed_password="old")
+    session = FakeSession()
+    refresh_tokens = []
+    service = make_service(user, session, refresh_tokens)
+
+    tokens = asyncio.run(service.login(SimpleNamespace(email="waiter@example.com", password="secret")))
+
+    claims = jwt_decode(tokens.access_token)
+    assert (claims["id"], claims["role"], claims["ver"]) == (1, "waiter", 3)
+    assert refresh_tokens[0]["user_id"] == 1
+    # the login's own session was neither rolled back nor used for the rehash
+    assert (session.commits, session.rollbacks) == (1, 0)
+    assert user.hashed_password == "old"
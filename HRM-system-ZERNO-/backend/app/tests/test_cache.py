@@ -0,0 +1,132 @@
+import asyncio
+
+from app.service import stats_cache
+from app.service.utils.cache import MemoryCacheBackend, RedisCacheBackend, TTLCache
+from app.service.utils.redis import RedisClient
+from app.tests.fake_redis import FakeRedis
+
+
+def test_ttl_cache_reports_evictions():
+    evicted = []
+    cache = TTLCache(ttl=60, maxsize=2, on_evict=evicted.append)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert evicted == ["b"]
+
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+    assert evicted == ["b", "a", "d"]
+
+
+def test_memory_backend_tags():
+    async def test():
+        cache = MemoryCacheBackend()
+        await cache.set("a", {"x": 1}, ttl=60, tags=["t1", "t2"])
+        await cache.set("b", [1], ttl=60, tags=["t1"])
+        assert await cache.get("a") == {"x": 1}
+
+        await cache.invalidate_tag("t1")
+        assert await cache.get("a") is None
+        assert await cache.get("b") is None
+        assert cache._tags == {}
+        assert cache._key_tags == {}
+
+    asyncio.run(test())
+
+
+def test_memory_backend_forgets_tags_of_evicted_keys():
+    async def test():
+        cache = MemoryCacheBackend(maxsize=2)
+        for key in "abcde":
+            await cache.set(key, 1, ttl=60, tags=[f"tag:{key}", "all"])
+        assert set(cache._tags) == {"tag:d", "tag:e", "all"}
+        assert cache._tags["all"] == {"d", "e"}
+        assert set(cache._key_tags) == {"d", "e"}
+
+        await cache.delete("d")
+        assert set(cache._tags) == {"tag:e", "all"}
+
+    asyncio.run(test())
+
+
+def test_memory_backend_add_and_incr():
+    async def test():
+        cache = MemoryCacheBackend()
+        assert await cache.add("key", 1, ttl=60)
+        assert not await cache.add("key", 2, ttl=60)
+        assert await cache.get("key") == 1
+
+        assert await cache.incr("counter", ttl=60) == 1
+        assert await cache.incr("counter", ttl=60) == 2
+        assert await cache.get("counter") == 2
+
+    asyncio.run(test())
+
+
+def test_redis_backend():
+    async def test():
+        server = await FakeRedis().start()
+        cache = RedisCacheBackend(RedisClient(port=server.port), namespace="test")
+        try:
+            await cache.set("a", {"x": 1}, ttl=60, tags=["t"])
+            assert await cache.get("a") == {"x": 1}
+            assert b"test:a" in server.data
+
+            assert not await cache.add("a", 2, ttl=60)
+            assert await cache.add("b", 2, ttl=60)
+
+            assert await cache.incr("counter", ttl=60) == 1
+            assert await cache.get("counter") == 1
+
+            await cache.invalidate_tag("t")
+            assert await cache.get("a") is None
+            assert await cache.get("b") == 2
+        finally:
+            await cache.client.close()
+            await server.stop()
+
+    asyncio.run(test())
+
+
+def test_redis_backend_degrades_to_misses():
+    async def test():
+        server = await FakeRedis().start()
+        client = RedisClient(port=server.port)
+        cache = RedisCacheBackend(client, namespace="test")
+        await cache.set("a", 1, ttl=60)
+        await server.stop()
+
+        assert await cache.get("a") is None
+        await cache.set("a", 1, ttl=60)
+        assert await cache.add("a", 1, ttl=60)
+        assert await cache.incr("counter", ttl=60) is None
+        await client.close()
+
+    asyncio.run(test())
+
+
+def test_get_or_set_skips_results_invalidated_while_computing(monkeypatch):
+    monkeypatch.setattr(stats_cache, "stats_cache", MemoryCacheBackend())
+
+    async def test():
+        async def compute_racing_a_write():
+            # a feedback about the waiter is committed while the stats are being computed
+            await stats_cache.invalidate_waiters([1])
+            return "before the write"
+
+        async def compute():
+            return "after the write"
+
+        assert await stats_cache.get_or_set("dashboard:1", 1, compute_racing_a_write) == "before the write"
+        assert await stats_cache.get_or_set("dashboard:1", 1, compute) == "after the write"
+
+        async def unexpected():
+            raise AssertionError("cached value expected")
+
+        assert await stats_cache.get_or_set("dashboard:1", 1, unexpected) == "after the write"
+        await stats_cache.invalidate_waiters([1])
+        assert await stats_cache.get_or_set("dashboard:1", 1, compute) == "after the write"
+
+    asyncio.run(test())
@@ -0,0 +1,102 @@
+import asyncio
+import datetime
+import os
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.db import Base
+from app.model import (
+    Category,
+    Contact,
+    Feedback,
+    FeedbackType,
+    Rating,
+    Tag,
+    TelegramOutbox,
+    User,
+    WaiterScore,
+    WaiterScoreDaily
+)
+from app.repository.public.feedbacks import FeedbackRepository
+from app.repository.public.telegram_outbox import TelegramOutboxRepository
+from app.repository.public.waiter_score_daily import WaiterScoreDailyRepository
+
+# a PostgreSQL database the test may create the tables in, everything it writes is rolled back
+TEST_CONNECTION_STRING = os.getenv("TEST_CONNECTION_STRING")
+
+pytestmark = pytest.mark.skipif(not TEST_CONNECTION_STRING, reason="TEST_CONNECTION_STRING is not set")
+
+
+def test_create_complete_feedback_is_one_statement():
+    async def test():
+        engine = create_async_engine(TEST_CONNECTION_STRING, poolclass=NullPool)
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            try:
+                await connection.run_sync(Base.metadata.create_all)
+                session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+
+                category = Category(category="test category")
+                waiter = User(first_name="Test", second_name="Waiter", email="waiter@test.local", hashed_password="-")
+                feedback_types = [FeedbackType(feedback_type="food"), FeedbackType(feedback_type="service")]
+                session.add_all([category, waiter, *feedback_types])
+                await session.flush()
+                tag = Tag(tag="test tag", category_id=category.id)
+                session.add(tag)
+                await session.flush()
+
+                feedback = Feedback(is_notified=False, created_at=datetime.datetime.now())
+                feedback.waiter_score = WaiterScore(
+                    waiter_id=waiter.id, score=5, comment="great", tag_id=tag.id, category_id=category.id
+                )
+                feedback.contact = Contact(phone="+70000000000")
+                feedback.ratings = [
+                    Rating(rating=4, feedback_type_id=feedback_types[0].id),
+                    Rating(rating=5, feedback_type_id=feedback_types[1].id)
+                ]
+
+                event.listen(engine.sync_engine, "before_cursor_execute", count)
+                try:
+                    await FeedbackRepository(session).create_complete_feedback(
+                        feedback,
+                        also=[
+                            WaiterScoreDailyRepository(session).apply_scores_statement(
+                                [(feedback.created_at.date(), feedback.waiter_score)]
+                            ),
+                            lambda feedback_id: TelegramOutboxRepository.enqueue_statement(feedback_id, ["-100"])
+                        ]
+                    )
+                finally:
+                    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+                assert len(statements) == 1, statements
+                assert statements[0].lstrip().upper().startswith("WITH")
+
+                assert feedback.id is not None
+                assert feedback.waiter_score.id is not None
+                assert feedback.contact.id is not None
+                assert sorted(rating.rating for rating in feedback.ratings) == [4, 5]
+                assert all(rating.id and rating.feedback_id == feedback.id for rating in feedback.ratings)
+
+                for model in (WaiterScore, Contact, Rating, TelegramOutbox):
+                    rows = await session.scalar(
+                        select(func.count()).select_from(model).where(model.feedback_id == feedback.id)
+                    )
+                    assert rows == (2 if model is Rating else 1), model.__name__
+                daily = await session.scalar(
+                    select(func.count()).select_from(WaiterScoreDaily).where(WaiterScoreDaily.waiter_id == waiter.id)
+                )
+                assert daily == 1
+            finally:
+                await transaction.rollback()
+        await engine.dispose()
+
+    asyncio.run(test())
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.service import ingest
+from app.service.ingest import IngestQueue, is_transient
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_RETRY_DELAY", 0)
+
+
+def outage() -> OperationalError:
+    return OperationalError("INSERT INTO feedbacks ...", {}, ConnectionRefusedError("connection refused"))
+
+
+def wrapped(error: Exception) -> HTTPException:
+    # FeedbackService reports database errors as a 400
+    try:
+        raise error
+    except Exception as e:
+        try:
+            raise HTTPException(status_code=400, detail=str(e))
+        except HTTPException as http_error:
+            return http_error
+
+
+def run(handler, items) -> None:
+    async def main():
+        queue = IngestQueue(handler, batch_size=len(items), max_delay=0.01)
+        queue.start()
+        for item in items:
+            queue.submit(item)
+        await queue.stop(timeout=10)
+
+    asyncio.run(main())
+
+
+def test_transient_errors():
+    assert is_transient(outage())
+    assert is_transient(wrapped(outage()))
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(wrapped(IntegrityError("INSERT", {}, Exception("duplicate key"))))
+    assert not is_transient(ValueError("bad item"))
+
+
+def test_outage_keeps_the_whole_batch():
+    calls = []
+
+    async def handler(batch):
+        calls.append(list(batch))
+        # the database is down for longer than the retries a bad item gets
+        if len(calls) <= ingest.INGEST_MAX_RETRIES + 3:
+            raise wrapped(outage())
+
+    run(handler, list(range(100)))
+
+    # never split and never dropped, written once the database is back
+    assert all(batch == list(range(100)) for batch in calls)
+    assert len(calls) == ingest.INGEST_MAX_RETRIES + 4
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_RETRY_DELAY", 1)
+    monkeypatch.setattr(ingest, "INGEST_MAX_BACKOFF", 4)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(ingest.asyncio, "sleep", sleep)
+    calls = []
+
+    async def handler(batch):
+        calls.append(batch)
+        if len(calls) <= 6:
+            raise outage()
+
+    asyncio.run(IngestQueue(handler)._flush([1, 2]))
+
+    assert delays == [1, 2, 4, 4, 4, 4]
+
+
+def test_only_the_bad_item_is_dropped():
+    written = []
+
+    async def handler(batch):
+        if 3 in batch:
+            raise ValueError("bad item")
+        written.extend(batch)
+
+    run(handler, list(range(8)))
+
+    assert sorted(written) == [0, 1, 2, 4, 5, 6, 7]
@@ -0,0 +1,157 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+
+from app.service import mailer as mailer_module
+from app.service.mailer import Mailer
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class Recorder:
+    """
+    aiosmtpd handler that keeps delivered messages and answers DATA with the queued replies first
+    """
+    def __init__(self, *replies: str):
+        self.replies = list(replies)
+        self.attempts = 0
+        self.messages: list[bytes] = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.attempts += 1
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope.content)
+        return "250 Message accepted for delivery"
+
+
+class SMTPServers:
+    def __init__(self):
+        self.running: list = []
+
+    def start(self, handler: Recorder, port: int | None = None):
+        # a fixed port, so that the server can be restarted where the mailer expects it
+        if port is None:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+        controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        self.running.append(controller)
+        return controller
+
+    def restart(self, controller):
+        # stopping the server closes the sessions open to it
+        controller.stop()
+        self.running.remove(controller)
+        return self.start(controller.handler, port=controller.port)
+
+    def stop(self) -> None:
+        for controller in self.running:
+            controller.stop()
+
+
+@pytest.fixture
+def smtp_server():
+    servers = SMTPServers()
+    yield servers
+    servers.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(mailer_module, "MAIL_RETRY_DELAY", 0)
+
+
+def make_message(index: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "hr@example.com"
+    message["To"] = f"user{index}@example.com"
+    message["Subject"] = f"Message {index}"
+    message.set_content(f"Body {index}")
+    return message
+
+
+class CountingMailer(Mailer):
+    connects = 0
+
+    def _connect(self) -> None:
+        super()._connect()
+        self.connects += 1
+
+
+def deliver(mailer: Mailer, *batches: list[EmailMessage], between=None):
+    async def main():
+        mailer.start()
+        for index, batch in enumerate(batches):
+            if index and between:
+                between()
+            for message in batch:
+                mailer.send(message)
+            await asyncio.wait_for(mailer._queue.join(), 10)
+        await mailer.stop()
+
+    asyncio.run(main())
+
+
+def test_messages_share_one_session(smtp_server):
+    handler = Recorder()
+    controller = smtp_server.start(handler)
+    mailer = CountingMailer(controller.hostname, controller.port, None, None, use_tls=False)
+
+    deliver(mailer, [make_message(i) for i in range(5)])
+
+    assert len(handler.messages) == 5
+    assert b"Subject: Message 4" in handler.messages[4]
+    assert mailer.connects == 1
+
+
+def test_reconnects_after_server_drops_session(smtp_server):
+    handler = Recorder()
+    controller = smtp_server.start(handler)
+    mailer = CountingMailer(controller.hostname, controller.port, None, None, use_tls=False)
+
+    deliver(mailer, [make_message(1)], [make_message(2)], between=lambda: smtp_server.restart(controller))
+
+    assert len(handler.messages) == 2
+    assert handler.attempts == 2
+    assert mailer.connects == 2
+
+
+def test_temporary_failure_is_retried(smtp_server):
+    handler = Recorder("451 Try again later")
+    controller = smtp_server.start(handler)
+    mailer = CountingMailer(controller.hostname, controller.port, None, None, use_tls=False)
+
+    deliver(mailer, [make_message(1)])
+
+    assert handler.attempts == 2
+    assert len(handler.messages) == 1
+
+
+def test_gives_up_after_max_attempts(smtp_server, monkeypatch):
+    monkeypatch.setattr(mailer_module, "MAIL_MAX_ATTEMPTS", 3)
+    handler = Recorder(*["451 Try again later"] * 3)
+    controller = smtp_server.start(handler)
+    mailer = CountingMailer(controller.hostname, controller.port, None, None, use_tls=False)
+
+    deliver(mailer, [make_message(1)], [make_message(2)])
+
+    # the first message was dropped after three attempts, the next one still goes out
+    assert handler.attempts == 3 + 1
+    assert len(handler.messages) == 1
+    assert b"Subject: Message 2" in handler.messages[0]
+
+
+def test_permanent_failure_is_not_retried(smtp_server):
+    handler = Recorder("550 Mailbox unavailable")
+    controller = smtp_server.start(handler)
+    mailer = CountingMailer(controller.hostname, controller.port, None, None, use_tls=False)
+
+    deliver(mailer, [make_message(1)], [make_message(2)])
+
+    assert handler.attempts == 2
+    assert len(handler.messages) == 1
+    assert b"Subject: Message 2" in handler.messages[0]
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.api.rate_limit import RateLimitMiddleware, parse_rate_limits, parse_trusted_proxies
+from app.service.utils.rate_limit import MemoryRateLimiter
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def make_middleware(**kwargs) -> RateLimitMiddleware:
+    return RateLimitMiddleware(
+        ok_app,
+        limiter=MemoryRateLimiter(),
+        limits=parse_rate_limits("/feedbacks/create=1/60"),
+        **kwargs
+    )
+
+
+def request(middleware, peer: str, path: str = "/feedbacks/create", headers: dict = None) -> int:
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "client": (peer, 40000),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, None, send))
+    return messages[0]["status"]
+
+
+def test_limits_per_peer_and_ignores_trailing_slash():
+    middleware = make_middleware()
+    assert request(middleware, "203.0.113.1") == 200
+    assert request(middleware, "203.0.113.1", path="/feedbacks/create/") == 429
+    assert request(middleware, "203.0.113.2") == 200
+    assert request(middleware, "203.0.113.2", path="/feedbacks/other") == 200
+
+
+def test_forwarded_headers_are_ignored_by_default():
+    middleware = make_middleware()
+    assert request(middleware, "203.0.113.1", headers={"X-Real-IP": "10.0.0.1"}) == 200
+    # a fresh header does not buy a fresh bucket
+    assert request(middleware, "203.0.113.1", headers={"X-Real-IP": "10.0.0.2"}) == 429
+
+
+def test_forwarded_headers_only_from_trusted_proxies():
+    middleware = make_middleware(trust_forwarded=True, trusted_proxies=parse_trusted_proxies("172.16.0.0/12"))
+
+    # clients behind the proxy get a bucket each
+    assert request(middleware, "172.18.0.5", headers={"X-Real-IP": "198.51.100.1"}) == 200
+    assert request(middleware, "172.18.0.5", headers={"X-Real-IP": "198.51.100.2"}) == 200
+    assert request(middleware, "172.18.0.5", headers={"X-Forwarded-For": "1.2.3.4, 198.51.100.3"}) == 200
+    assert request(middleware, "172.18.0.5", headers={"X-Real-IP": "198.51.100.1"}) == 429
+
+    # a client reaching the backend directly cannot pick its bucket
+    assert request(middleware, "203.0.113.1", headers={"X-Real-IP": "198.51.100.4"}) == 200
+    assert request(middleware, "203.0.113.1", headers={"X-Real-IP": "198.51.100.5"}) == 429
+
+
+def test_parse_trusted_proxies():
+    assert [str(network) for network in parse_trusted_proxies(" 127.0.0.1, ::1,10.0.0.0/8,")] == [
+        "127.0.0.1/32", "::1/128", "10.0.0.0/8"
+    ]
+    with pytest.raises(ValueError):
+        parse_trusted_proxies("nginx")
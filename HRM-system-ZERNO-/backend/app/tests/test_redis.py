@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from app.service.utils import redis
+from app.service.utils.redis import RedisClient, RedisError
+from app.tests.fake_redis import FakeRedis
+
+
+def run_with_server(test, password: str | None = None):
+    async def main():
+        server = await FakeRedis(password=password).start()
+        try:
+            await test(server)
+        finally:
+            await server.stop()
+    asyncio.run(main())
+
+
+def test_from_url():
+    client = RedisClient.from_url("redis://:secret@cache:6380/2")
+    assert (client.host, client.port, client.db, client.password) == ("cache", 6380, 2, "secret")
+
+    client = RedisClient.from_url("redis://")
+    assert (client.host, client.port, client.db, client.password) == ("localhost", 6379, 0, None)
+
+
+def test_encode():
+    assert RedisClient._encode(("SET", "key", b"\r\n", 5)) == b"*4\r\n$3\r\nSET\r\n$3\r\nkey\r\n$2\r\n\r\n\r\n$1\r\n5\r\n"
+
+
+def test_replies():
+    async def test(server):
+        client = RedisClient(port=server.port)
+        assert await client.execute("SET", "key", "value") == "OK"
+        assert await client.execute("GET", "key") == b"value"
+        assert await client.execute("GET", "missing") is None
+        assert await client.execute("INCR", "counter") == 1
+        assert await client.execute("SADD", "set", "a", "b") == 2
+        assert sorted(await client.execute("SMEMBERS", "set")) == [b"a", b"b"]
+        await client.close()
+
+    run_with_server(test)
+
+
+def test_pipeline_is_one_connection():
+    async def test(server):
+        client = RedisClient(port=server.port)
+        replies = await client.pipeline([("SET", "a", 1), ("INCR", "a"), ("GET", "a")])
+        assert replies == ["OK", 2, b"2"]
+        assert await client.execute("GET", "a") == b"2"
+        assert server.connections == 1
+        await client.close()
+
+    run_with_server(test)
+
+
+def test_handshake_authenticates_and_selects_db():
+    async def test(server):
+        client = RedisClient.from_url(f"redis://:secret@127.0.0.1:{server.port}/3")
+        assert await client.execute("SET", "key", "value") == "OK"
+        assert server.commands[:2] == [[b"AUTH", b"secret"], [b"SELECT", b"3"]]
+        await client.close()
+
+        client = RedisClient.from_url(f"redis://:wrong@127.0.0.1:{server.port}")
+        with pytest.raises(RedisError, match="WRONGPASS"):
+            await client.execute("GET", "key")
+        await client.close()
+
+    run_with_server(test, password="secret")
+
+
+def test_error_reply_keeps_connection():
+    async def test(server):
+        client = RedisClient(port=server.port)
+        with pytest.raises(RedisError, match="unknown command"):
+            await client.pipeline([("SET", "key", "value"), ("NOPE",)])
+        # every reply of the pipeline was read, the next call gets its own reply
+        assert await client.execute("GET", "key") == b"value"
+        assert server.connections == 1
+        await client.close()
+
+    run_with_server(test)
+
+
+def test_reconnects_after_backoff(monkeypatch):
+    async def test(server):
+        client = RedisClient(port=server.port)
+        await client.execute("SET", "key", "value")
+        server.drop_connections()
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(RedisError):
+            await client.execute("GET", "key")
+        # failing fast until the backoff is over
+        with pytest.raises(RedisError, match="waiting before reconnecting"):
+            await client.execute("GET", "key")
+        assert server.connections == 1
+
+        monkeypatch.setattr(redis, "RECONNECT_BACKOFF", 0)
+        client._retry_at = 0
+        assert await client.execute("GET", "key") == b"value"
+        assert server.connections == 2
+        await client.close()
+
+    run_with_server(test)
+
+
+def test_unreachable_server():
+    async def test():
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+
+        client = RedisClient(port=port, timeout=0.5)
+        with pytest.raises(RedisError):
+            await client.execute("GET", "key")
+
+    asyncio.run(test())
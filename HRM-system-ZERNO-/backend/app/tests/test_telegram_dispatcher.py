@@ -0,0 +1,210 @@
+import asyncio
+import json
+
+import httpx
+
+from app.model import TelegramOutbox
+from app.service.telegram_dispatcher import TELEGRAM_MESSAGE_LIMIT, TelegramDispatcher
+from app.service.utils.rate_limit import MemoryRateLimiter
+
+TOKEN = "123:secret"
+
+
+class MockTelegram:
+    """
+    Stands in for the Bot API: records sendMessage calls and answers with the queued responses, then 200.
+    """
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.messages: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == f"/bot{TOKEN}/sendMessage"
+        self.messages.append(json.loads(request.content))
+        response = self.responses.pop(0) if self.responses else None
+        if isinstance(response, Exception):
+            raise response
+        return response or httpx.Response(200, json={"ok": True, "result": {}})
+
+
+def make_dispatcher(telegram: MockTelegram, **kwargs) -> TelegramDispatcher:
+    kwargs.setdefault("rate_per_second", 1000)
+    kwargs.setdefault("chat_rate_per_minute", 60000)
+    dispatcher = TelegramDispatcher(TOKEN, **kwargs)
+    dispatcher._client = httpx.AsyncClient(
+        base_url="https://api.telegram.test",
+        transport=httpx.MockTransport(telegram)
+    )
+    return dispatcher
+
+
+def rows(*feedback_ids: int, chat_id: str = "-100", digest: bool = False, attempts: int = 0) -> list[TelegramOutbox]:
+    return [
+        TelegramOutbox(id=feedback_id, feedback_id=feedback_id, chat_id=chat_id, digest=digest, attempts=attempts)
+        for feedback_id in feedback_ids
+    ]
+
+
+def test_sends_packed_messages_in_order():
+    telegram = MockTelegram()
+    dispatcher = make_dispatcher(telegram)
+    half = TELEGRAM_MESSAGE_LIMIT // 2
+    texts = {1: "first", 2: "second", 3: "x" * half, 4: "y" * half}
+
+    sent, retry, failed = asyncio.run(dispatcher._send_chat("-100", rows(1, 2, 3, 4), texts, {}))
+
+    assert sent == [1, 2, 3, 4]
+    assert (retry, dict(failed)) == ({}, {})
+    assert [message["text"] for message in telegram.messages] == ["first\nsecond\n" + texts[3], texts[4]]
+    assert {message["chat_id"] for message in telegram.messages} == {"-100"}
+    assert dispatcher.metrics["messages_sent"] == 2
+    assert dispatcher.metrics["notifications_delivered"] == 4
+
+
+def test_long_text_is_sent_whole():
+    telegram = MockTelegram()
+    dispatcher = make_dispatcher(telegram)
+    # long comments, longer than half a message but each fitting one
+    texts = {1: "short", 2: "c" * 3000, 3: "d" * 4000}
+
+    sent, _, _ = asyncio.run(dispatcher._send_chat("-100", rows(1, 2, 3), texts, {}))
+
+    assert sent == [1, 2, 3]
+    assert [message["text"] for message in telegram.messages] == ["short\n" + texts[2], texts[3]]
+
+
+def test_text_over_the_limit_is_truncated():
+    telegram = MockTelegram()
+    dispatcher = make_dispatcher(telegram)
+    texts = {1: "😀" * TELEGRAM_MESSAGE_LIMIT}
+
+    sent, _, _ = asyncio.run(dispatcher._send_chat("-100", rows(1), texts, {}))
+
+    assert sent == [1]
+    [message] = telegram.messages
+    assert message["text"].endswith("…")
+    assert message["text"].startswith("😀" * 100)
+    # emoji count twice, no half emoji is left before the ellipsis
+    assert len(message["text"].encode("utf-16-le")) // 2 <= TELEGRAM_MESSAGE_LIMIT
+    assert "\ufffd" not in message["text"]
+
+
+def test_digest_after_full_messages():
+    telegram = MockTelegram()
+    dispatcher = make_dispatcher(telegram)
+
+    sent, _, _ = asyncio.run(dispatcher._send_chat(
+        "-100",
+        rows(1) + rows(2, 3, digest=True),
+        {1: "urgent"},
+        {2: "line two", 3: "line three"}
+    ))
+
+    assert sent == [1, 2, 3]
+    assert telegram.messages[0]["text"] == "urgent"
+    assert "line two" in telegram.messages[1]["text"] and "line three" in telegram.messages[1]["text"]
+    assert dispatcher.metrics["digests_sent"] == 1
+
+
+def test_deleted_feedback_is_dropped():
+    telegram = MockTelegram()
+    dispatcher = make_dispatcher(telegram)
+
+    sent, _, _ = asyncio.run(dispatcher._send_chat("-100", rows(1, 2), {2: "still here"}, {}))
+
+    assert sorted(sent) == [1, 2]
+    assert [message["text"] for message in telegram.messages] == ["still here"]
+
+
+def test_rate_limited_chat_is_retried_in_order():
+    telegram = MockTelegram(
+        httpx.Response(200, json={"ok": True}),
+        httpx.Response(429, json={"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 7}})
+    )
+    dispatcher = make_dispatcher(telegram)
+    texts = {i: str(i) * (TELEGRAM_MESSAGE_LIMIT // 2) for i in (1, 2, 3)}
+
+    sent, retry, failed = asyncio.run(dispatcher._send_chat("-100", rows(1, 2, 3), texts, {}))
+
+    assert sent == [1]
+    # the message after the rejected one was not attempted, it keeps its place behind it
+    assert len(telegram.messages) == 2
+    [(ids, error)] = retry.values()
+    assert ids == [2, 3]
+    assert error == "429: Too Many Requests"
+    assert dict(failed) == {}
+    assert dispatcher.metrics["rate_limited"] == 1
+    assert dispatcher._chat_buckets["-100"].try_acquire() > 6
+
+
+def test_client_error_fails_rows():
+    telegram = MockTelegram(httpx.Response(400, json={"ok": False, "description": "Bad Request: chat not found"}))
+    dispatcher = make_dispatcher(telegram)
+
+    sent, retry, failed = asyncio.run(dispatcher._send_chat("-100", rows(1), {1: "text"}, {}))
+
+    assert (sent, retry) == ([], {})
+    assert dict(failed) == {"400: Bad Request: chat not found": [1]}
+    assert dispatcher.metrics["notifications_failed"] == 1
+
+
+def test_server_errors_give_up_after_max_attempts():
+    telegram = MockTelegram(httpx.Response(502, text="Bad Gateway"))
+    dispatcher = make_dispatcher(telegram, max_attempts=3)
+
+    sent, retry, failed = asyncio.run(dispatcher._send_chat("-100", rows(1, attempts=3), {1: "text"}, {}))
+
+    assert (sent, retry) == ([], {})
+    assert dict(failed) == {"502: Bad Gateway": [1]}
+
+
+def test_network_error_is_retried_without_leaking_the_token():
+    telegram = MockTelegram(httpx.ConnectError(f"cannot connect to /bot{TOKEN}/sendMessage"))
+    dispatcher = make_dispatcher(telegram)
+
+    sent, retry, failed = asyncio.run(dispatcher._send_chat("-100", rows(1), {1: "text"}, {}))
+
+    [(ids, error)] = retry.values()
+    assert ids == [1]
+    assert error == "ConnectError"
+    assert TOKEN not in error
+
+
+def test_rates_are_split_between_workers_without_a_shared_limiter():
+    dispatcher = TelegramDispatcher(TOKEN, rate_per_second=24, chat_rate_per_minute=20, workers=4)
+    assert dispatcher._bot_bucket.rate == 6
+
+    shared = TelegramDispatcher(TOKEN, rate_per_second=24, workers=4, rate_limiter=MemoryRateLimiter())
+    assert shared._bot_bucket.rate == 24
+
+
+class RecordingLimiter(MemoryRateLimiter):
+    def __init__(self):
+        super().__init__()
+        self.hits: list[tuple[str, float]] = []
+
+    async def hit(self, key: str, rate: float, capacity: float) -> float:
+        wait = await super().hit(key, rate, capacity)
+        self.hits.append((key, wait))
+        return wait
+
+
+def test_workers_share_the_bot_limit():
+    limiter = RecordingLimiter()
+    telegram = MockTelegram()
+    # two processes of one deployment, each with its own local buckets
+    dispatchers = [make_dispatcher(telegram, rate_per_second=20, rate_limiter=limiter) for _ in range(2)]
+
+    async def send():
+        await asyncio.gather(*(
+            dispatcher._send_chat(f"chat-{i}", rows(i, chat_id=f"chat-{i}"), {i: "text"}, {})
+            for i, dispatcher in enumerate(dispatchers * 15)
+        ))
+
+    asyncio.run(send())
+
+    assert len(telegram.messages) == 30
+    bot_hits = [wait for key, wait in limiter.hits if key == "bot"]
+    # one bucket of 20 for both, the rest had to wait for it to refill
+    assert sum(1 for wait in bot_hits if not wait) == 30
+    assert any(bot_hits)